@@ -0,0 +1,192 @@
+import asyncio
+import time
+from collections import deque
+
+import aiohttp
+
+# Ошибки, означающие перегрузку сервера: тайм-ауты и обрыв соединения.
+OVERLOAD_ERRORS = (asyncio.TimeoutError, aiohttp.ServerTimeoutError, aiohttp.ServerDisconnectedError)
+
+
+def is_overload_status(status: int) -> bool:
+    """Признак перегрузки сервера по коду ответа: 429 или 5xx."""
+
+    return status == 429 or status >= 500
+
+
+class Slot:
+    """Слот для одного запроса, выданный AdaptiveLimiter.slot()."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.overloaded = False
+
+    def report_status(self, status: int):
+        """Сообщение кода ответа: 429 и 5xx уменьшают лимит."""
+
+        if is_overload_status(status):
+            self.overloaded = True
+
+
+class AdaptiveLimiter:
+    """Адаптивное ограничение количества одновременных запросов (AIMD).
+
+    Лимит растёт, пока задержка ответов остаётся близкой к минимальной
+    наблюдаемой за последнее окно ответов: в начале (slow start) на 1 после каждого успешного
+    запроса, затем на 1 за каждые `limit` успешных запросов. При росте
+    задержки больше чем в latency_tolerance раз, тайм-аутах и ответах
+    429/5xx лимит умножается на decrease_factor. Уменьшение срабатывает
+    не чаще одного раза на волну запросов: ответы на запросы, начатые до
+    предыдущего уменьшения, его не повторяют.
+
+    Параметры:
+        initial_limit (int): начальный лимит.
+        min_limit (int): минимальный лимит.
+        max_limit (int): максимальный лимит.
+        decrease_factor (float): множитель лимита при перегрузке.
+        latency_tolerance (float): допустимый рост задержки относительно минимальной.
+        window (int): через сколько ответов минимальная задержка пересчитывается
+        заново, чтобы ограничитель подстраивался под постоянный рост задержки.
+    """
+
+    def __init__(self, initial_limit: int = 16, min_limit: int = 1, max_limit: int = 100,
+                 decrease_factor: float = 0.5, latency_tolerance: float = 2.0, window: int = 100):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self.window = window
+        self.min_latency = None
+        self.smoothed_latency = None
+        self._window_min = None
+        self._window_count = 0
+        self.successes = 0
+        self.overloads = 0
+        self.decreases = 0
+        self._slow_start = True
+        self._last_decrease = 0.0
+        self._waiters = deque()
+        self._loop = None
+
+    def _check_loop(self):
+        # Future ожидающих запросов привязаны к циклу событий, а модульный ограничитель
+        # переживает несколько вызовов asyncio.run(), поэтому очередь создаётся заново в каждом цикле.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._waiters = deque()
+            self.in_flight = 0
+
+    def _wake_waiters(self):
+        # Слоты передаются ожидающим в порядке очереди, и будится ровно столько
+        # запросов, сколько слотов свободно, а не все ожидающие.
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def acquire(self) -> Slot:
+        self._check_loop()
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return Slot()
+        waiter = self._loop.create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Слот уже был передан отменённому запросу: он переходит следующему.
+                self.in_flight -= 1
+                self._wake_waiters()
+            raise
+        return Slot()
+
+    async def release(self, slot: Slot, completed: bool = True):
+        """Освобождение слота. Отменённые запросы (completed=False) не учитываются."""
+
+        if completed:
+            self.record(slot, time.monotonic() - slot.started)
+        self._check_loop()
+        self.in_flight -= 1
+        self._wake_waiters()
+
+    def record(self, slot: Slot, latency: float):
+        """Учёт результата запроса и пересчёт лимита."""
+
+        if slot.overloaded:
+            self.overloads += 1
+            self._decrease(slot)
+            return
+        self.successes += 1
+        if self.min_latency is None or latency < self.min_latency:
+            self.min_latency = latency
+        if self._window_min is None or latency < self._window_min:
+            self._window_min = latency
+        self._window_count += 1
+        if self._window_count >= self.window:
+            self.min_latency = self._window_min
+            self._window_min = None
+            self._window_count = 0
+        if self.smoothed_latency is None:
+            self.smoothed_latency = latency
+        else:
+            self.smoothed_latency = 0.8 * self.smoothed_latency + 0.2 * latency
+        # Небольшой запас, чтобы доли миллисекунды на локальной сети не считались ростом задержки.
+        threshold = self.min_latency * self.latency_tolerance + 0.001
+        if self.smoothed_latency > threshold:
+            self._decrease(slot)
+        elif self._slow_start:
+            self.limit = min(self.max_limit, self.limit + 1)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def _decrease(self, slot: Slot):
+        if slot.started < self._last_decrease:
+            return
+        self._slow_start = False
+        self._last_decrease = time.monotonic()
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        self.decreases += 1
+        # После уменьшения лимита задержка сравнивается с новой очередью запросов заново.
+        self.smoothed_latency = None
+
+    def slot(self):
+        """Асинхронный контекстный менеджер, занимающий слот на время запроса.
+
+        Исключения из OVERLOAD_ERRORS внутри блока считаются перегрузкой.
+        """
+
+        return _SlotContext(self)
+
+    def stats(self) -> dict:
+        """Текущий лимит и статистика ограничителя."""
+
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "min_latency": self.min_latency,
+            "smoothed_latency": self.smoothed_latency,
+            "successes": self.successes,
+            "overloads": self.overloads,
+            "decreases": self.decreases,
+        }
+
+
+class _SlotContext:
+    def __init__(self, limiter: AdaptiveLimiter):
+        self._limiter = limiter
+        self._slot = None
+
+    async def __aenter__(self) -> Slot:
+        self._slot = await self._limiter.acquire()
+        return self._slot
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        if exc_type is not None and issubclass(exc_type, OVERLOAD_ERRORS):
+            self._slot.overloaded = True
+        is_cancelled = exc_type is not None and issubclass(exc_type, asyncio.CancelledError)
+        await self._limiter.release(self._slot, completed=not is_cancelled)
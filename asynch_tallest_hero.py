@@ -1,23 +1,95 @@
 import os
 import pprint
 import asyncio
-import aiohttp
+from collections import deque, namedtuple
 from dotenv import load_dotenv
 
+import profiling
+from adaptive_limiter import AdaptiveLimiter, is_overload_status
+from http_backend import use_async_session
+from json_decoder import CachedHero, SearchFields, cache_entries, decode_search_fields, materialize
+from result_cache import ResultCache
+from sampling import PreviewResult, confidence, stratified_order
+from shared_cache import SharedCache, get_within, hero_cache_from_env, release_claim, release_claims
+
 load_dotenv()
 ACCESS_TOKEN = os.getenv("ACCESS_TOKEN")
+API_URL = os.getenv("API_URL", "https://superheroapi.com/api")
 
 START_ID = 1
 MAX_ID = 731
-hero_cache = {}
+MAX_RETRIES = 3
+RETRY_DELAY = 0.05
+CHUNK_SIZE = 25
+CONNECTIONS = 32
+PREVIEW_BUDGET = 0.5
+hero_cache = hero_cache_from_env(default_max_entries=MAX_ID)
+result_cache = ResultCache()
+concurrency_limiter = AdaptiveLimiter()
+
+# Результат поиска с ограничением по времени: герой и признак полного обхода.
+QueryResult = namedtuple("QueryResult", ["hero", "is_complete"])
+
+
+async def _call_cache(cache, method: str, *args):
+    if isinstance(cache, SharedCache):
+        # Общий кэш может ждать, пока героя загрузит другой процесс, поэтому вызывается вне цикла событий.
+        return await asyncio.to_thread(getattr(cache, method), *args)
+    return getattr(cache, method)(*args)
+
+async def _lookup_shared(cache: SharedCache, keys: list, function, *args):
+    # Поиск в общем кэше в отдельном потоке. Поток не прерывается отменой и может
+    # закрепить ключи за процессом уже после неё, поэтому при отмене закрепления
+    # снимаются, когда поток завершится (чужие закрепления release_many не трогает).
+    lookup = asyncio.ensure_future(asyncio.to_thread(function, *args))
+    try:
+        return await asyncio.shield(lookup)
+    except asyncio.CancelledError:
+        lookup.add_done_callback(lambda done: release_claims(cache, keys))
+        raise
+
+async def _get_cached(cache, character_id: int, timeout: float = None):
+    # Поиск в кэше; общий кэш ждёт загрузку другим процессом не дольше timeout.
+    if not isinstance(cache, SharedCache):
+        return cache.get(character_id)
+    return await _lookup_shared(cache, [character_id], get_within, cache, character_id, timeout)
+
+async def _fetch_hero_content(session, character_id: int) -> bytes:
+    """Загрузка ответа API для героя без декодирования.
 
+    Количество одновременных запросов регулирует concurrency_limiter.
+    Ответы 429 и 5xx уменьшают лимит и повторяются до MAX_RETRIES раз.
 
-async def get_hero_info(session, character_id: int) -> dict:
+    Исключения:
+        RuntimeError: если возникает ошибка при получении информации о герое.
+    """
+
+    for attempt in range(MAX_RETRIES + 1):
+        async with concurrency_limiter.slot() as slot:
+            async with session.get(f"{API_URL}/{ACCESS_TOKEN}/{character_id}") as response:
+                slot.report_status(response.status)
+                if response.status == 200:
+                    return await response.read()
+                if not is_overload_status(response.status) or attempt == MAX_RETRIES:
+                    raise RuntimeError(
+                        f"Ошибка при получении информации о герое с ID {character_id}: {response.status}"
+                    )
+        await asyncio.sleep(RETRY_DELAY * 2 ** attempt)
+
+async def get_hero_info(session, character_id: int, cache=None) -> dict:
     """Получение информации о герое по его ID.
+
+    Количество одновременных запросов регулирует concurrency_limiter.
+    Ответы 429 и 5xx уменьшают лимит и повторяются до MAX_RETRIES раз.
+    В кэше хранится исходный JSON ответа с полями поиска (CachedHero),
+    словарь декодируется из него при каждом вызове. Поиск героев
+    сравнивает только поля поиска (см. _get_hero_entry).
     
     Параметры:
-        session: объект сессии для выполнения HTTP-запросов.
+        session: объект сессии для выполнения HTTP-запросов
+        (aiohttp.ClientSession или http_backend.HTTPXAsyncSession).
         character_id (int): ID героя, информацию о котором необходимо получить.
+        cache: кэш героев, по умолчанию hero_cache.
 
     Возвращает:
         dict: информация о герое в виде словаря.
@@ -26,18 +98,96 @@ async def get_hero_info(session, character_id: int) -> dict:
         RuntimeError: если возникает ошибка при получении информации о герое.
     """
 
-    if character_id in hero_cache:
-        return hero_cache[character_id]
+    cached_hero = await _get_hero_entry(session, character_id, cache)
+    with profiling.span("decode", id=character_id):
+        return materialize(cached_hero)
 
-    async with session.get(f"https://superheroapi.com/api/{ACCESS_TOKEN}/{character_id}") as response:
-        if response.status == 200:
-            current_hero_info = await response.json()
-            hero_cache[character_id] = current_hero_info
-            return current_hero_info
-        else:
-            raise RuntimeError(
-                f"Ошибка при получении информации о герое с ID {character_id}: {response.status}"
-            )
+async def _get_hero_entry(session, character_id: int, cache=None, deadline: float = None) -> CachedHero:
+    # Запись кэша героя; при промахе из ответа декодируются только поля поиска.
+    # deadline (по часам цикла событий) ограничивает ожидание общего кэша.
+    cache = cache if cache is not None else hero_cache
+    timeout = max(deadline - asyncio.get_running_loop().time(), 0) if deadline is not None else None
+    cached_hero = await _get_cached(cache, character_id, timeout)
+    if cached_hero is not None:
+        return cached_hero
+
+    try:
+        content = await _fetch_hero_content(session, character_id)
+        with profiling.span("decode", id=character_id):
+            cached_hero = CachedHero(decode_search_fields(content), bytes(content))
+    except BaseException:
+        # Ошибка или отмена запроса: другие процессы не должны ждать этого героя.
+        release_claim(cache, character_id)
+        raise
+    await _call_cache(cache, "__setitem__", character_id, cached_hero)
+    return cached_hero
+
+async def _fetch_batch(session, chunk: list, cache) -> list:
+    if isinstance(cache, SharedCache):
+        found = await _lookup_shared(cache, chunk, cache.get_many, chunk)
+    else:
+        found = cache.get_many(chunk)
+    missing = [current_id for current_id in chunk if current_id not in found]
+    if missing:
+        try:
+            contents = [await _fetch_hero_content(session, current_id) for current_id in missing]
+            with profiling.span("decode", heroes=len(missing)):
+                fetched = dict(zip(missing, cache_entries(contents)))
+        except BaseException:
+            # Общий кэш закрепил отсутствующих героев за процессом: другие не должны их ждать.
+            release_claims(cache, missing)
+            raise
+        await _call_cache(cache, "set_many", fetched)
+        found.update(fetched)
+    return [(current_id, found[current_id]) for current_id in chunk]
+
+async def fetch_hero_batches(session, ids: list, chunk_size: int = CHUNK_SIZE, connections: int = CONNECTIONS,
+                             cache=None):
+    """Получение героев пакетами.
+
+    ID делятся на пакеты по chunk_size. Пакеты обрабатывают connections
+    исполнителей: каждый загружает ID своего пакета по очереди через одно
+    постоянное соединение, поэтому на пакет приходятся одна проверка кэша,
+    одно декодирование полей поиска и одна запись в кэш, а не по одной на героя.
+
+    Параметры:
+        session: объект сессии для выполнения HTTP-запросов.
+        ids (list): ID героев.
+        chunk_size (int): размер пакета.
+        connections (int): количество одновременно обрабатываемых пакетов.
+        cache: кэш героев, по умолчанию hero_cache.
+
+    Возвращает:
+        асинхронный генератор списков пар (ID, CachedHero) в порядке готовности
+        пакетов. Полный словарь героя возвращает json_decoder.materialize.
+
+    Исключения:
+        RuntimeError: если возникает ошибка при получении информации о герое.
+    """
+
+    cache = cache if cache is not None else hero_cache
+    pending = deque(ids[start:start + chunk_size] for start in range(0, len(ids), chunk_size))
+    chunks_count = len(pending)
+    batches = asyncio.Queue()
+
+    async def worker():
+        try:
+            while pending:
+                batches.put_nowait(await _fetch_batch(session, pending.popleft(), cache))
+        except Exception as error:
+            batches.put_nowait(error)
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(connections, chunks_count))]
+    try:
+        for _ in range(chunks_count):
+            batch = await batches.get()
+            if isinstance(batch, Exception):
+                raise batch
+            yield batch
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
         
 
 def convert_height_to_cm(height: str) -> int:
@@ -65,7 +215,104 @@ def convert_height_to_cm(height: str) -> int:
         else:
             raise ValueError("Неизвестный формат роста")
 
-async def tallest_hero(gender: str, has_job: bool) -> dict:
+def get_hero_height(hero: dict, gender: str, has_job: bool):
+    """Рост героя в сантиметрах, если он подходит под критерии поиска.
+
+    Параметры:
+        hero (dict): информация о герое.
+        gender (str): пол супергероя.
+        has_job (bool): наличие работы у супергероя.
+
+    Возвращает:
+        int или None: рост героя или None, если герой не подходит
+        или его рост указан некорректно.
+    """
+
+    if hero is None:
+        return None
+    base = hero.get("work", {}).get("base", "")
+    is_base_valid = (has_job and base not in ["-", ""]) or (not has_job and base in ["", "-"])
+    if hero["appearance"]["gender"] != gender or not is_base_valid:
+        return None
+    try:
+        return convert_height_to_cm(hero["appearance"]["height"][1])
+    except ValueError:
+        return None
+
+def get_fields_height(fields: SearchFields, gender: str, has_job: bool):
+    """Рост героя по полям поиска (см. get_hero_height) без декодирования всего героя."""
+
+    if fields.gender != gender or (fields.base not in ["-", ""]) != has_job:
+        return None
+    try:
+        return convert_height_to_cm(fields.height)
+    except ValueError:
+        return None
+
+def _is_taller(current_height: int, current_id: int, max_height: int, tallest_id) -> bool:
+    # При равном росте выбирается герой с меньшим ID, как при последовательном обходе.
+    is_tie = tallest_id is not None and current_height == max_height
+    return current_height > max_height or (is_tie and current_id < tallest_id)
+
+async def _get_hero_with_id(session, character_id: int, cache=None, deadline: float = None) -> tuple:
+    return character_id, await _get_hero_entry(session, character_id, cache=cache, deadline=deadline)
+
+async def tallest_hero_within(gender: str, has_job: bool, timeout: float = None, http2: bool = False,
+                              session=None, cache=None) -> QueryResult:
+    """Поиск самого высокого супергероя с ограничением по времени.
+
+    Героев обрабатывают по мере получения и сравнивают по полям поиска,
+    полностью декодируется только найденный герой. Если к моменту истечения
+    timeout получены не все герои, незавершённые запросы отменяются,
+    сессия закрывается, а возвращается лучший из уже найденных героев.
+
+    Параметры:
+        gender (str): пол супергероя.
+        has_job (bool): наличие работы у супергероя.
+        timeout (float): ограничение времени в секундах (None — без ограничения).
+        http2 (bool): использовать HTTP/2 (требуется httpx[http2]).
+        session: сессия для запросов; если не передана, создаётся новая
+        с учётом http2. Переданная сессия не закрывается.
+        cache: кэш героев, по умолчанию hero_cache.
+
+    Возвращает:
+        QueryResult: самый высокий герой (или пустой словарь) и признак
+        is_complete — были ли проверены все герои.
+    """
+
+    tallest = None
+    tallest_id = None
+    max_height = 0
+    is_complete = True
+    deadline = asyncio.get_running_loop().time() + timeout if timeout is not None else None
+
+    async with use_async_session(session, http2) as session:
+        tasks = [
+            asyncio.create_task(_get_hero_with_id(session, current_id, cache, deadline))
+            for current_id in range(START_ID, MAX_ID + 1)
+        ]
+        try:
+            for next_hero in asyncio.as_completed(tasks, timeout=timeout):
+                current_id, current_hero = await next_hero
+                with profiling.span("filter", id=current_id):
+                    current_height = get_fields_height(current_hero.fields, gender, has_job)
+                if current_height is None:
+                    continue
+                if _is_taller(current_height, current_id, max_height, tallest_id):
+                    max_height = current_height
+                    tallest_id = current_id
+                    tallest = current_hero
+        except asyncio.TimeoutError:
+            is_complete = False
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    with profiling.span("decode"):
+        return QueryResult(materialize(tallest) if tallest is not None else {}, is_complete)
+
+async def tallest_hero(gender: str, has_job: bool, http2: bool = False, session=None, cache=None) -> dict:
     """Поиск самого высокого супергероя по заданным критериям.
 
     Если герой не имеет места работы (base) или оно указано как '-',
@@ -74,42 +321,174 @@ async def tallest_hero(gender: str, has_job: bool) -> dict:
     Параметры:
         gender (str): пол супергероя.
         has_job (bool): наличие работы у супергероя.
+        http2 (bool): использовать HTTP/2 (требуется httpx[http2]).
+        session: сессия для запросов; если не передана, создаётся новая
+        с учётом http2. Переданная сессия не закрывается.
+        cache: кэш героев, по умолчанию hero_cache.
 
     Возвращает:
         dict: Словарь с информацией о самом высоком супергерое,
         соответствующем заданным критериям.
     """
 
-    tallest_hero_id = None
-    max_height = 0
+    result = await tallest_hero_within(gender, has_job, http2=http2, session=session, cache=cache)
+    return result.hero
+
+async def tallest_hero_preview(gender: str, has_job: bool, budget: float = PREVIEW_BUDGET,
+                               sample_size: int = None, http2: bool = False, seed=None,
+                               session=None, cache=None) -> PreviewResult:
+    """Быстрый предварительный поиск самого высокого супергероя по выборке.
 
-    async with aiohttp.ClientSession() as session:
-        tasks = [get_hero_info(session, current_id) for current_id in range(START_ID, MAX_ID + 1)]
-        heroes = await asyncio.gather(*tasks)
+    Герои запрашиваются в порядке sampling.stratified_order, поэтому первые
+    полученные герои — случайная выборка из всего диапазона ID. Через
+    budget секунд (или после проверки sample_size героев) возвращается
+    самый высокий из уже проверенных героев, а обход продолжается в фоне
+    до точного ответа, совпадающего с tallest_hero. Фоновая задача
+    работает в текущем цикле событий: его нельзя завершать, пока не
+    получен точный ответ, а отменить её можно через exact.cancel().
 
-        for current_hero in heroes:
-            if current_hero is None:
-                continue
-            base = current_hero.get("work", {}).get("base", "")
-            is_base_valid = (has_job and base not in ["-", ""]) or (not has_job and base in ["", "-"])
+    Параметры:
+        gender (str): пол супергероя.
+        has_job (bool): наличие работы у супергероя.
+        budget (float): время ожидания предварительного ответа в секундах
+        (None — без ограничения).
+        sample_size (int): количество героев, после проверки которых
+        предварительный ответ возвращается раньше budget.
+        http2 (bool): использовать HTTP/2 (требуется httpx[http2]).
+        seed: начальное значение генератора случайной выборки.
+        session: сессия для запросов; если не передана, создаётся новая
+        с учётом http2. Переданную сессию нельзя закрывать до получения exact.
+        cache: кэш героев, по умолчанию hero_cache.
+
+    Возвращает:
+        PreviewResult: предварительный герой (или пустой словарь), число
+        проверенных и всех героев, оценка достоверности и asyncio.Task
+        exact с точным ответом.
+
+    Исключения:
+        RuntimeError: если запрос завершился ошибкой до предварительного ответа.
+    """
+
+    order = stratified_order(START_ID, MAX_ID, seed=seed)
+    best = {"hero": None, "id": None, "height": 0, "checked": 0}
+    sampled = asyncio.Event()
 
-            if current_hero["appearance"]["gender"] == gender and is_base_valid:
+    def best_hero() -> dict:
+        with profiling.span("decode"):
+            return materialize(best["hero"]) if best["hero"] is not None else {}
+
+    async def refine() -> dict:
+        try:
+            async with use_async_session(session, http2) as refine_session:
+                tasks = [
+                    asyncio.create_task(_get_hero_with_id(refine_session, current_id, cache))
+                    for current_id in order
+                ]
                 try:
-                    current_height = convert_height_to_cm(current_hero["appearance"]["height"][1])
-                    if current_height > max_height:
+                    for next_hero in asyncio.as_completed(tasks):
+                        current_id, current_hero = await next_hero
+                        with profiling.span("filter", id=current_id):
+                            current_height = get_fields_height(current_hero.fields, gender, has_job)
+                        if current_height is not None and _is_taller(current_height, current_id,
+                                                                     best["height"], best["id"]):
+                            best.update(hero=current_hero, id=current_id, height=current_height)
+                        best["checked"] += 1
+                        if sample_size is not None and best["checked"] >= sample_size:
+                            sampled.set()
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+            return best_hero()
+        finally:
+            sampled.set()
+
+    exact = asyncio.create_task(refine())
+    try:
+        await asyncio.wait_for(sampled.wait(), budget)
+    except asyncio.TimeoutError:
+        pass
+    if exact.done():
+        exact.result()
+    checked = best["checked"]
+    return PreviewResult(best_hero(), checked, len(order), confidence(checked, len(order)), exact)
+
+async def tallest_hero_batched(gender: str, has_job: bool, chunk_size: int = CHUNK_SIZE,
+                               connections: int = CONNECTIONS, http2: bool = False, cache=None,
+                               session=None) -> dict:
+    """Поиск самого высокого супергероя с загрузкой героев пакетами.
+
+    Результат совпадает с tallest_hero, но герои загружаются через
+    fetch_hero_batches, что снижает накладные расходы на каждый запрос.
+    Герои сравниваются по полям поиска, полностью декодируется только найденный.
+
+    Параметры:
+        gender (str): пол супергероя.
+        has_job (bool): наличие работы у супергероя.
+        chunk_size (int): размер пакета.
+        connections (int): количество одновременно обрабатываемых пакетов.
+        http2 (bool): использовать HTTP/2 (требуется httpx[http2]).
+        cache: кэш героев, по умолчанию hero_cache.
+        session: сессия для запросов; если не передана, создаётся новая
+        с учётом http2. Переданная сессия не закрывается.
+
+    Возвращает:
+        dict: Словарь с информацией о самом высоком супергерое.
+    """
+
+    tallest = None
+    tallest_id = None
+    max_height = 0
+
+    async with use_async_session(session, http2) as session:
+        ids = list(range(START_ID, MAX_ID + 1))
+        async for batch in fetch_hero_batches(session, ids, chunk_size, connections, cache):
+            with profiling.span("filter", heroes=len(batch)):
+                for current_id, current_hero in batch:
+                    current_height = get_fields_height(current_hero.fields, gender, has_job)
+                    if current_height is not None and _is_taller(current_height, current_id, max_height, tallest_id):
                         max_height = current_height
-                        tallest_hero_id = current_hero
-                except ValueError:
-                    continue
+                        tallest_id = current_id
+                        tallest = current_hero
+
+    with profiling.span("decode"):
+        return materialize(tallest) if tallest is not None else {}
+
+async def tallest_hero_cached(gender: str, has_job: bool, http2: bool = False, cache: ResultCache = None) -> dict:
+    """Поиск самого высокого супергероя с кэшированием результата.
+
+    API не сообщает версию данных, поэтому результат хранится в файловом
+    кэше не дольше cache.revalidate_after секунд (см. ResultCache.current_generation).
+    Повторные запросы в этот период не обращаются к сети.
+
+    Параметры:
+        gender (str): пол супергероя.
+        has_job (bool): наличие работы у супергероя.
+        http2 (bool): использовать HTTP/2 (требуется httpx[http2]).
+        cache (ResultCache): кэш результатов, по умолчанию result_cache.
+
+    Возвращает:
+        dict: Словарь с информацией о самом высоком супергерое.
+    """
+
+    cache = cache if cache is not None else result_cache
+    version = cache.current_generation(API_URL)
+    cached_hero = cache.get(API_URL, version, gender, has_job)
+    if cached_hero is not None:
+        return cached_hero
+    hero = await tallest_hero(gender, has_job, http2)
+    cache.put(API_URL, version, gender, has_job, hero)
+    return hero
+
+def get_metrics() -> dict:
+    """Метрики модуля: статистика кэша героев и текущий лимит одновременных запросов."""
 
-    if tallest_hero_id is not None:
-        return tallest_hero_id
-    return {}
+    return {"hero_cache": hero_cache.stats(), "concurrency": concurrency_limiter.stats()}
 
 def main():
-    result = asyncio.run(tallest_hero("Male", True))
+    args = profiling.parse_args("Поиск самого высокого супергероя через API (асинхронно)")
+    result = profiling.run(lambda: asyncio.run(tallest_hero("Male", True)), args)
     pprint.pprint(result)
 
 if __name__ == "__main__":
-    main()
-    hero_cache.clear()
\ No newline at end of file
+    main()
\ No newline at end of file
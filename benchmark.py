@@ -0,0 +1,319 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import asynch_tallest_hero
+import json_decoder
+import shared_cache
+import synch_tallest_hero_api
+import tallest_hero_all
+from adaptive_limiter import AdaptiveLimiter
+from bounded_cache import BoundedCache
+from generate_heroes import generate_heroes, to_api_response
+from http_backend import ACCEPT_ENCODING, HTTP2_AVAILABLE, create_sync_session
+from stub_server import StubServer
+
+IDENTITY_HEADERS = {"Accept-Encoding": "identity"}
+COMPRESSED_HEADERS = {"Accept-Encoding": ACCEPT_ENCODING}
+
+
+def point_modules_to(stub: StubServer):
+    tallest_hero_all.ALL_HEROES_URL = f"{stub.url}/all.json"
+    synch_tallest_hero_api.API_URL = f"{stub.url}/api"
+    asynch_tallest_hero.API_URL = f"{stub.url}/api"
+    synch_tallest_hero_api.MAX_ID = len(stub.heroes_by_id)
+    asynch_tallest_hero.MAX_ID = len(stub.heroes_by_id)
+
+
+def use_headers(headers: dict):
+    tallest_hero_all.DEFAULT_HEADERS = headers
+    synch_tallest_hero_api.DEFAULT_HEADERS = headers
+
+
+def measure(stub: StubServer, name: str, func, results: list):
+    synch_tallest_hero_api.hero_cache.clear()
+    asynch_tallest_hero.hero_cache.clear()
+    stub.reset_stats()
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    results.append((name, elapsed, stub.requests_count, stub.bytes_sent))
+
+
+def run(count: int, latency: float = 0.0) -> list:
+    results = []
+    with StubServer(list(generate_heroes(count))) as stub:
+        stub.latency = latency
+        point_modules_to(stub)
+
+        use_headers(IDENTITY_HEADERS)
+        measure(stub, "all.json identity", lambda: tallest_hero_all.get_tallest_hero("Male", True), results)
+        use_headers(COMPRESSED_HEADERS)
+        measure(stub, "all.json compressed", lambda: tallest_hero_all.get_tallest_hero("Male", True), results)
+
+        use_headers(IDENTITY_HEADERS)
+        measure(stub, "sync api identity", lambda: synch_tallest_hero_api.get_tallest_hero("Male", True), results)
+        use_headers(COMPRESSED_HEADERS)
+        measure(stub, "sync api compressed", lambda: synch_tallest_hero_api.get_tallest_hero("Male", True), results)
+        measure(stub, "sync api batched", lambda: synch_tallest_hero_api.get_tallest_hero_batched("Male", True), results)
+        measure(stub, "async api aiohttp", lambda: asyncio.run(asynch_tallest_hero.tallest_hero("Male", True)), results)
+        measure(stub, "async api batched",
+                lambda: asyncio.run(asynch_tallest_hero.tallest_hero_batched("Male", True)), results)
+
+        if HTTP2_AVAILABLE:
+            def all_json_httpx():
+                with create_sync_session(http2=True) as session:
+                    tallest_hero_all.get_tallest_hero("Male", True, session)
+
+            measure(stub, "all.json httpx", all_json_httpx, results)
+            measure(stub, "sync api httpx", lambda: synch_tallest_hero_api.get_tallest_hero("Male", True, http2=True), results)
+            measure(stub, "async api httpx", lambda: asyncio.run(asynch_tallest_hero.tallest_hero("Male", True, http2=True)), results)
+    return results
+
+
+def run_decode(count: int, repeat: int = 50) -> list:
+    """Сравнение скорости декодирования all.json и отдельных героев."""
+
+    heroes = list(generate_heroes(count))
+    all_json = json.dumps(heroes).encode()
+    documents = [json.dumps(hero).encode() for hero in heroes]
+    cases = []
+    for backend, loads in json_decoder.DECODERS.items():
+        cases.append((f"all.json {backend}", lambda loads=loads: loads(all_json)))
+        cases.append((f"heroes {backend}", lambda loads=loads: [loads(document) for document in documents]))
+    cases.append(("all.json search fields", lambda: json_decoder.decode_hero_list(all_json)))
+    cases.append(("heroes search fields", lambda: [json_decoder.decode_search_fields(document) for document in documents]))
+
+    results = []
+    for name, func in cases:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        elapsed = (time.perf_counter() - started) / repeat
+        results.append((name, elapsed, count / elapsed))
+    return results
+
+
+def run_cache(count: int, repeat: int = 20) -> list:
+    """Сравнение кэша декодированных словарей и кэша исходного JSON с полями поиска.
+
+    Возвращает:
+        list: кортежи (вариант кэша, объём в байтах, время поиска по горячему кэшу в секундах).
+    """
+
+    def build_dicts():
+        contents = [json.dumps(to_api_response(hero)).encode() for hero in generate_heroes(count)]
+        return {hero_id: json_decoder.loads(content) for hero_id, content in enumerate(contents, 1)}
+
+    def build_entries():
+        contents = [json.dumps(to_api_response(hero)).encode() for hero in generate_heroes(count)]
+        return dict(enumerate(json_decoder.cache_entries(contents), 1))
+
+    def query_dicts(cache):
+        tallest, max_height = {}, 0
+        for hero in cache.values():
+            height = synch_tallest_hero_api.get_hero_height(hero, "Male", True)
+            if height is not None and height > max_height:
+                tallest, max_height = hero, height
+        return tallest
+
+    def query_entries(cache):
+        tallest, max_height = None, 0
+        for entry in cache.values():
+            height = synch_tallest_hero_api.get_fields_height(entry.fields, "Male", True)
+            if height is not None and height > max_height:
+                tallest, max_height = entry, height
+        return json_decoder.materialize(tallest)
+
+    def build_module_cache():
+        entries = build_entries()
+        synch_tallest_hero_api.hero_cache = BoundedCache()
+        synch_tallest_hero_api.hero_cache.set_many(entries)
+        synch_tallest_hero_api.MAX_ID = count
+        return synch_tallest_hero_api.hero_cache
+
+    def query_module_cache(cache):
+        return synch_tallest_hero_api.get_tallest_hero("Male", True)
+
+    results = []
+    for name, build, query in [
+        ("словари", build_dicts, query_dicts),
+        ("JSON + поля поиска", build_entries, query_entries),
+        ("get_tallest_hero", build_module_cache, query_module_cache),
+    ]:
+        tracemalloc.start()
+        cache = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            query(cache)
+        results.append((name, size, (time.perf_counter() - started) / repeat))
+    return results
+
+
+ADAPTIVE_PROFILES = [
+    ("быстрый API", 0.002, None),
+    ("медленный API", 0.02, None),
+    ("API с лимитом 8", 0.005, 8),
+    ("API с лимитом 32", 0.005, 32),
+]
+
+
+def run_adaptive(count: int) -> list:
+    """Проверка адаптивного ограничения запросов на заглушке со сменой профиля задержки."""
+
+    results = []
+    limiter = AdaptiveLimiter()
+    asynch_tallest_hero.concurrency_limiter = limiter
+    with StubServer(list(generate_heroes(count))) as stub:
+        point_modules_to(stub)
+        for name, latency, capacity in ADAPTIVE_PROFILES:
+            stub.latency, stub.capacity = latency, capacity
+            asynch_tallest_hero.hero_cache.clear()
+            stub.reset_stats()
+            started = time.perf_counter()
+            asyncio.run(asynch_tallest_hero.tallest_hero("Male", True))
+            elapsed = time.perf_counter() - started
+            metrics = asynch_tallest_hero.get_metrics()["concurrency"]
+            results.append((name, elapsed, metrics["limit"], stub.max_api_in_flight, stub.rejected_count))
+    return results
+
+
+def run_preview(count: int, latency: float, budget: float, runs: int = 5) -> list:
+    """Предварительные ответы по выборке: время, оценка достоверности и рост относительно точного ответа."""
+
+    async def preview_async(seed: int):
+        preview = await asynch_tallest_hero.tallest_hero_preview("Male", True, budget, seed=seed)
+        preview_elapsed = time.perf_counter() - started
+        return preview, preview_elapsed, await preview.exact
+
+    def preview_sync(seed: int):
+        preview = synch_tallest_hero_api.get_tallest_hero_preview("Male", True, budget, seed=seed)
+        preview_elapsed = time.perf_counter() - started
+        return preview, preview_elapsed, preview.exact.result()
+
+    results = []
+    with StubServer(list(generate_heroes(count))) as stub:
+        stub.latency = latency
+        point_modules_to(stub)
+        for name, query in [("sync api", preview_sync), ("async api", lambda seed: asyncio.run(preview_async(seed)))]:
+            for seed in range(runs):
+                synch_tallest_hero_api.hero_cache.clear()
+                asynch_tallest_hero.hero_cache.clear()
+                started = time.perf_counter()
+                preview, preview_elapsed, exact = query(seed)
+                exact_elapsed = time.perf_counter() - started
+                height_share = (synch_tallest_hero_api.get_hero_height(preview.hero, "Male", True) or 0) / \
+                    synch_tallest_hero_api.get_hero_height(exact, "Male", True)
+                results.append((name, preview_elapsed, preview.confidence, height_share, exact_elapsed))
+    return results
+
+
+WORKER_SCRIPT = """
+import asyncio, sys
+import asynch_tallest_hero, tallest_hero_all
+url, count = sys.argv[1], int(sys.argv[2])
+tallest_hero_all.ALL_HEROES_URL = f"{url}/all.json"
+asynch_tallest_hero.API_URL = f"{url}/api"
+asynch_tallest_hero.MAX_ID = count
+asyncio.run(asynch_tallest_hero.tallest_hero("Male", True))
+tallest_hero_all.get_tallest_hero("Male", True)
+print(next(line.split()[1] for line in open("/proc/self/status") if line.startswith("VmHWM:")))
+"""
+
+
+def _rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def run_workers(count: int, workers: int) -> list:
+    """Запуск нескольких процессов-воркеров с локальными кэшами и с общим кэшем."""
+
+    results = []
+    with StubServer(list(generate_heroes(count))) as stub, tempfile.TemporaryDirectory() as directory:
+        for name, address in [("локальные кэши", None), ("общий кэш", os.path.join(directory, "cache.sock"))]:
+            env = dict(os.environ)
+            env.pop("HERO_SHARED_CACHE", None)
+            daemon = None
+            if address is not None:
+                daemon = shared_cache.start_daemon(address)
+                env["HERO_SHARED_CACHE"] = address
+            stub.reset_stats()
+            started = time.perf_counter()
+            processes = [
+                subprocess.Popen([sys.executable, "-c", WORKER_SCRIPT, stub.url, str(count)], env=env,
+                                 cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.PIPE, text=True)
+                for _ in range(workers)
+            ]
+            rss = [int(process.communicate()[0]) for process in processes]
+            elapsed = time.perf_counter() - started
+            daemon_rss = 0
+            if daemon is not None:
+                daemon_rss = _rss_kb(daemon.pid)
+                daemon.terminate()
+                daemon.wait()
+            results.append((name, elapsed, stub.requests_count, sum(rss) + daemon_rss, daemon_rss))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк загрузки героев с локальной заглушки")
+    parser.add_argument("--heroes", type=int, default=asynch_tallest_hero.MAX_ID, help="количество героев")
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа заглушки в секундах")
+    parser.add_argument("--decode", action="store_true", help="сравнить скорость декодирования JSON")
+    parser.add_argument("--adaptive", action="store_true", help="проверить адаптивное ограничение запросов")
+    parser.add_argument("--cache", action="store_true", help="сравнить объём кэша и время поиска по нему")
+    parser.add_argument("--workers", type=int, help="сравнить локальные и общий кэш в WORKERS процессах")
+    parser.add_argument("--preview", type=float, metavar="BUDGET",
+                        help="проверить предварительные ответы по выборке за BUDGET секунд")
+    args = parser.parse_args()
+
+    if args.cache:
+        print(f"{'кэш':<22}{'объём, МБ':>12}{'поиск, мс':>12}")
+        for name, size, elapsed in run_cache(args.heroes):
+            print(f"{name:<22}{size / 2 ** 20:>12.2f}{elapsed * 1000:>12.3f}")
+        return
+
+    if args.preview is not None:
+        print(f"{'сценарий':<12}{'ответ, с':>10}{'достоверность':>15}{'рост, %':>9}{'точный, с':>11}")
+        for name, preview_elapsed, hero_confidence, height_share, exact_elapsed in run_preview(
+                args.heroes, args.latency, args.preview):
+            print(f"{name:<12}{preview_elapsed:>10.3f}{hero_confidence:>15.2f}{height_share:>9.0%}{exact_elapsed:>11.3f}")
+        return
+
+    if args.workers:
+        print(f"{'кэш':<18}{'время, с':>10}{'запросов':>10}{'RSS всего, МБ':>15}{'RSS демона, МБ':>16}")
+        for name, elapsed, requests_count, total_rss, daemon_rss in run_workers(args.heroes, args.workers):
+            print(f"{name:<18}{elapsed:>10.3f}{requests_count:>10}{total_rss / 1024:>15.1f}{daemon_rss / 1024:>16.1f}")
+        return
+
+    if args.adaptive:
+        print(f"{'профиль':<20}{'время, с':>10}{'лимит':>8}{'макс. запросов':>16}{'ответов 429':>13}")
+        for name, elapsed, limit, max_in_flight, rejected in run_adaptive(args.heroes):
+            print(f"{name:<20}{elapsed:>10.3f}{limit:>8}{max_in_flight:>16}{rejected:>13}")
+        return
+
+    if args.decode:
+        print(f"{'сценарий':<28}{'время, мс':>10}{'героев/с':>14}")
+        for name, elapsed, throughput in run_decode(args.heroes):
+            print(f"{name:<28}{elapsed * 1000:>10.3f}{throughput:>14.0f}")
+        return
+
+    print(f"{'сценарий':<24}{'время, с':>10}{'запросов':>10}{'байт':>12}")
+    for name, elapsed, requests_count, bytes_sent in run(args.heroes, args.latency):
+        print(f"{name:<24}{elapsed:>10.3f}{requests_count:>10}{bytes_sent:>12}")
+
+
+if __name__ == "__main__":
+    main()
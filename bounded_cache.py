@@ -0,0 +1,184 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+def approximate_size(value) -> int:
+    """Приблизительный размер объекта в памяти с учётом вложенных объектов.
+
+    Параметры:
+        value: словарь, список, строка или другой объект.
+
+    Возвращает:
+        int: размер в байтах.
+    """
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approximate_size(key) + approximate_size(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(approximate_size(item) for item in value)
+    return size
+
+
+class BoundedCache:
+    """Ограниченный кэш с вытеснением давно неиспользуемых записей (LRU).
+
+    Поддерживает ограничение по количеству записей и по приблизительному
+    объёму памяти, а также время жизни записей (TTL). Работает как словарь:
+    `key in cache`, `cache[key]`, `cache[key] = value`, `cache.get(key)`,
+    `cache.clear()`, поэтому заменяет обычный dict в get_hero_info.
+
+    Параметры:
+        max_entries (int): максимальное количество записей (None — без ограничения).
+        max_bytes (int): максимальный приблизительный объём записей в байтах.
+        ttl (float): время жизни записи в секундах (None — бессрочно).
+        clock: функция текущего времени, по умолчанию time.monotonic.
+    """
+
+    def __init__(self, max_entries: int = None, max_bytes: int = None, ttl: float = None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls, default_max_entries: int = None):
+        """Создание кэша по переменным окружения.
+
+        Используются HERO_CACHE_MAX_ENTRIES, HERO_CACHE_MAX_BYTES и HERO_CACHE_TTL.
+        """
+
+        def read(name, convert, default=None):
+            value = os.getenv(name)
+            return convert(value) if value else default
+
+        return cls(
+            max_entries=read("HERO_CACHE_MAX_ENTRIES", int, default_max_entries),
+            max_bytes=read("HERO_CACHE_MAX_BYTES", int),
+            ttl=read("HERO_CACHE_TTL", float),
+        )
+
+    def _is_expired(self, expires_at) -> bool:
+        return expires_at is not None and self._clock() >= expires_at
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self._is_expired(entry[2]):
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return entry[0]
+
+    def get_many(self, keys) -> dict:
+        """Найденные записи для нескольких ключей под одной блокировкой.
+
+        Возвращает:
+            dict: ключи и значения найденных записей.
+        """
+
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._lookup(key)
+                if entry is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                    found[key] = entry[0]
+        return found
+
+    def set_many(self, items: dict):
+        """Сохранение нескольких записей под одной блокировкой."""
+
+        with self._lock:
+            for key, value in items.items():
+                self.set(key, value)
+
+    def __getitem__(self, key):
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.misses += 1
+                raise KeyError(key)
+            self.hits += 1
+            return entry[0]
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def set(self, key, value, ttl: float = None):
+        """Сохранение записи со своим временем жизни (по умолчанию — self.ttl)."""
+
+        ttl = ttl if ttl is not None else self.ttl
+        size = approximate_size(value)
+        expires_at = self._clock() + ttl if ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self.current_bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries) or
+            (self.max_bytes is not None and self.current_bytes > self.max_bytes)
+        ):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._is_expired(entry[2])
+
+    def __delitem__(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        """Статистика кэша: попадания, промахи, вытеснения, размер."""
+
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import pprint
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import asynch_tallest_hero
+import tallest_hero_all
+from http_backend import create_async_session
+from json_decoder import decode_hero_list, materialize
+
+SOURCES = ("all.json", "api", "snapshot")
+SNAPSHOT_PATH = os.getenv("HERO_SNAPSHOT_PATH")
+# Снимок старше SNAPSHOT_MAX_AGE секунд не участвует в гонке.
+SNAPSHOT_MAX_AGE = float(os.getenv("HERO_SNAPSHOT_MAX_AGE", 24 * 60 * 60))
+
+# Итог гонки источников: найденный герой, победивший источник и отчёты по всем источникам.
+FastestResult = namedtuple("FastestResult", ["hero", "source", "reports"])
+# Отчёт источника: статус ("won", "completed", "cancelled", "failed"), время в секундах и ошибка.
+SourceReport = namedtuple("SourceReport", ["status", "elapsed", "error"])
+
+
+def _validate(heroes: list) -> list:
+    # Победить может только полный каталог: героев не меньше, чем ID в API,
+    # и у каждого есть поля поиска. Иначе усечённый снимок или частичный
+    # all.json вытеснил бы полные источники.
+    expected = asynch_tallest_hero.MAX_ID - asynch_tallest_hero.START_ID + 1
+    if len(heroes) < expected:
+        raise ValueError(f"Неполный список героев: {len(heroes)} из {expected}")
+    for fields, _ in heroes:
+        if fields.gender is None or not fields.height:
+            raise ValueError("У героя нет полей поиска (пол и рост)")
+    return heroes
+
+
+async def _load_all_json(session) -> list:
+    async with session.get(tallest_hero_all.ALL_HEROES_URL) as response:
+        if response.status != 200:
+            raise RuntimeError(f"Ошибка при загрузке all.json: {response.status}")
+        return _validate(decode_hero_list(await response.read()))
+
+
+async def _load_api(session) -> list:
+    ids = list(range(asynch_tallest_hero.START_ID, asynch_tallest_hero.MAX_ID + 1))
+    heroes = []
+    async for batch in asynch_tallest_hero.fetch_hero_batches(session, ids):
+        heroes.extend(batch)
+    # Пакеты приходят в порядке готовности, а при равном росте должен побеждать меньший ID.
+    heroes.sort(key=lambda pair: pair[0])
+    return _validate([(hero.fields, hero) for _, hero in heroes])
+
+
+async def _load_snapshot(path: str) -> list:
+    if path is None:
+        raise FileNotFoundError("Путь к локальному снимку all.json не задан")
+    age = time.time() - os.path.getmtime(path)
+    if age > SNAPSHOT_MAX_AGE:
+        raise ValueError(f"Снимок all.json устарел: {age:.0f} с")
+    content = await asyncio.to_thread(Path(path).read_bytes)
+    return _validate(decode_hero_list(content))
+
+
+def save_snapshot(path: str, session=None):
+    """Сохранение текущего all.json в локальный снимок.
+
+    Файл записывается атомарно, поэтому снимок можно обновлять,
+    пока он используется в tallest_hero_fastest.
+    """
+
+    content = tallest_hero_all.fetch_all_heroes_raw(session)
+    temp_path = f"{path}.tmp"
+    Path(temp_path).write_bytes(content)
+    os.replace(temp_path, path)
+
+
+async def tallest_hero_fastest(gender: str, has_job: bool, sources=SOURCES, snapshot_path: str = None,
+                               http2: bool = False) -> FastestResult:
+    """Поиск самого высокого супергероя по самому быстрому источнику.
+
+    Источники запускаются одновременно: all.json (см. tallest_hero_all),
+    API superheroapi.com (все ID через asynch_tallest_hero.fetch_hero_batches)
+    и локальный снимок all.json не старше SNAPSHOT_MAX_AGE секунд.
+    Используется первый источник, вернувший полный список героев (не
+    меньше MAX_ID, у каждого пол и рост), остальные отменяются.
+
+    Параметры:
+        gender (str): пол супергероя.
+        has_job (bool): наличие работы у супергероя.
+        sources: источники для гонки, подмножество SOURCES.
+        snapshot_path (str): путь к снимку all.json, по умолчанию HERO_SNAPSHOT_PATH.
+        http2 (bool): использовать HTTP/2 (требуется httpx[http2]).
+
+    Возвращает:
+        FastestResult: герой (или пустой словарь), имя победившего
+        источника и словарь SourceReport по каждому источнику.
+
+    Исключения:
+        RuntimeError: если ни один источник не вернул список героев.
+    """
+
+    snapshot_path = snapshot_path or SNAPSHOT_PATH
+    started = time.perf_counter()
+    reports = {}
+    winner = None
+
+    async with create_async_session(http2) as session:
+        loaders = {
+            "all.json": lambda: _load_all_json(session),
+            "api": lambda: _load_api(session),
+            "snapshot": lambda: _load_snapshot(snapshot_path),
+        }
+        tasks = {asyncio.create_task(loaders[source]()): source for source in sources}
+        pending = set(tasks)
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                elapsed = time.perf_counter() - started
+                # При одновременном завершении побеждает источник, указанный раньше в sources.
+                for task in sorted(done, key=lambda task: sources.index(tasks[task])):
+                    error = task.exception()
+                    if error is not None:
+                        reports[tasks[task]] = SourceReport("failed", elapsed, repr(error))
+                    elif winner is None:
+                        winner = task
+                        reports[tasks[task]] = SourceReport("won", elapsed, None)
+                    else:
+                        reports[tasks[task]] = SourceReport("completed", elapsed, None)
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            elapsed = time.perf_counter() - started
+            for task in pending:
+                reports[tasks[task]] = SourceReport("cancelled", elapsed, None)
+
+    if winner is None:
+        raise RuntimeError(f"Ни один источник не вернул список героев: {reports}")
+    tallest_document = tallest_hero_all.find_tallest_document(winner.result(), gender, has_job)
+    hero = materialize(tallest_document) if tallest_document is not None else {}
+    return FastestResult(hero, tasks[winner], reports)
+
+
+def main():
+    result = asyncio.run(tallest_hero_fastest("Male", True))
+    print(f"источник: {result.source}")
+    for source, report in result.reports.items():
+        print(f"  {source}: {report.status}, {report.elapsed:.3f} с" + (f", {report.error}" if report.error else ""))
+    pprint.pprint(result.hero)
+
+
+if __name__ == "__main__":
+    main()
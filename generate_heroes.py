@@ -0,0 +1,224 @@
+import argparse
+import json
+import random
+import re
+
+GENDERS = [("Male", 0.67), ("Female", 0.27), ("-", 0.06)]
+BASES = [
+    "Gotham City", "Metropolis", "New York, New York", "Batcave, Stately Wayne Manor, Gotham City",
+    "Baxter Building, New York", "Asgard", "Wakanda", "Hall of Justice", "Xavier Institute, Westchester",
+    "Mobile", "Themyscira", "Central City", "Star City", "Coast City", "Atlantis",
+]
+PUBLISHERS = ["Marvel Comics", "DC Comics", "Dark Horse Comics", "Image Comics", "George Lucas"]
+RACES = ["Human", "Mutant", "Kryptonian", "Asgardian", "Alien", "Android", "-"]
+COLORS = ["Blue", "Brown", "Green", "Black", "Red", "Yellow", "-"]
+INVALID_HEIGHTS = ["-", "", "0", "Unknown", "-175 cm"]
+
+
+def _choice_weighted(rnd: random.Random, options: list):
+    value, threshold = options[-1][0], rnd.random()
+    for option, weight in options:
+        if threshold < weight:
+            return option
+        threshold -= weight
+    return value
+
+
+def _height(rnd: random.Random) -> list:
+    """Рост в формате all.json: [неметрический, метрический]."""
+
+    kind = rnd.random()
+    if kind < 0.80:
+        cm = max(50, int(rnd.gauss(183, 15)))
+        inches = round(cm / 2.54)
+        return [f"{inches // 12}'{inches % 12}", f"{cm} cm"]
+    if kind < 0.85:
+        meters = round(rnd.uniform(2.5, 60), 1)
+        return [f"{int(meters * 3.28)}'0", f"{meters} meters"]
+    if kind < 0.90:
+        return ["-", "0 cm"]
+    return ["-", rnd.choice(INVALID_HEIGHTS)]
+
+
+def generate_hero(hero_id: int, rnd: random.Random) -> dict:
+    """Генерация одного героя в формате all.json.
+
+    Параметры:
+        hero_id (int): ID героя.
+        rnd (random.Random): генератор случайных чисел.
+
+    Возвращает:
+        dict: информация о герое.
+    """
+
+    name = f"Hero {hero_id}"
+    slug = f"{hero_id}-hero-{hero_id}"
+    base_kind = rnd.random()
+    if base_kind < 0.40:
+        base = "-"
+    elif base_kind < 0.45:
+        base = ""
+    else:
+        base = rnd.choice(BASES)
+    weight = rnd.randint(40, 400)
+    return {
+        "id": hero_id,
+        "name": name,
+        "slug": slug,
+        "powerstats": {
+            stat: rnd.randint(1, 100)
+            for stat in ["intelligence", "strength", "speed", "durability", "power", "combat"]
+        },
+        "appearance": {
+            "gender": _choice_weighted(rnd, GENDERS),
+            "race": rnd.choice(RACES),
+            "height": _height(rnd),
+            "weight": [f"{int(weight * 2.2)} lb", f"{weight} kg"],
+            "eyeColor": rnd.choice(COLORS),
+            "hairColor": rnd.choice(COLORS),
+        },
+        "biography": {
+            "fullName": name,
+            "alterEgos": "No alter egos found.",
+            "aliases": [f"Alias {hero_id}"],
+            "placeOfBirth": "-",
+            "firstAppearance": f"Comics #{rnd.randint(1, 900)}",
+            "publisher": rnd.choice(PUBLISHERS),
+            "alignment": rnd.choice(["good", "bad", "neutral"]),
+        },
+        "work": {
+            "occupation": rnd.choice(["-", "Adventurer", "Businessman", "Reporter", "Scientist"]),
+            "base": base,
+        },
+        "connections": {
+            "groupAffiliation": rnd.choice(["-", "Justice League", "Avengers", "X-Men"]),
+            "relatives": "-",
+        },
+        "images": {
+            size: f"https://cdn.jsdelivr.net/gh/akabab/superhero-api@0.3.0/api/images/{size}/{slug}.jpg"
+            for size in ["xs", "sm", "md", "lg"]
+        },
+    }
+
+
+def generate_heroes(count: int, seed: int = 0):
+    """Детерминированная генерация героев с ID от 1 до count.
+
+    Параметры:
+        count (int): количество героев.
+        seed (int): зерно генератора, одинаковое зерно даёт одинаковые данные.
+
+    Возвращает:
+        генератор словарей в формате all.json.
+    """
+
+    rnd = random.Random(seed)
+    for hero_id in range(1, count + 1):
+        yield generate_hero(hero_id, rnd)
+
+
+def generate_changes(count: int, events: int, seed: int = 0):
+    """Детерминированная лента изменений: добавление count героев, затем events изменений.
+
+    Изменения — обновления (новые данные для существующего ID), удаления
+    (около 10%) и повторные добавления удалённых героев.
+
+    Возвращает:
+        генератор событий {"op": "insert"/"update", "hero": {...}} и {"op": "delete", "id": ID}.
+    """
+
+    for hero in generate_heroes(count, seed):
+        yield {"op": "insert", "hero": hero}
+    rnd = random.Random(seed + 1)
+    deleted = set()
+    for _ in range(events):
+        hero_id = rnd.randint(1, count)
+        if hero_id in deleted:
+            deleted.discard(hero_id)
+            yield {"op": "insert", "hero": generate_hero(hero_id, rnd)}
+        elif rnd.random() < 0.1:
+            deleted.add(hero_id)
+            yield {"op": "delete", "id": hero_id}
+        else:
+            yield {"op": "update", "hero": generate_hero(hero_id, rnd)}
+
+
+def _kebab_case(key: str) -> str:
+    return re.sub(r"([A-Z])", lambda match: "-" + match.group(1).lower(), key)
+
+
+def to_api_response(hero: dict) -> dict:
+    """Преобразование героя из формата all.json в ответ API superheroapi.com.
+
+    В API ID и характеристики передаются строками, ключи разделов записаны
+    через дефис (eye-color, full-name), а вместо images — поле image.
+    """
+
+    response = {"response": "success", "id": str(hero["id"])}
+    for key, value in hero.items():
+        if key in ("id", "slug", "images"):
+            continue
+        if key == "powerstats":
+            response[key] = {stat: str(stat_value) for stat, stat_value in value.items()}
+        elif isinstance(value, dict):
+            response[key] = {_kebab_case(field): field_value for field, field_value in value.items()}
+        else:
+            response[key] = value
+    if "images" in hero:
+        response["image"] = {"url": hero["images"]["lg"]}
+    return response
+
+
+def write_all_json(path: str, count: int, seed: int = 0):
+    """Потоковая запись набора героев в файл формата all.json.
+
+    Герои записываются по одному, поэтому размер набора не ограничен памятью.
+    """
+
+    with open(path, "w", buffering=1024 * 1024) as file:
+        file.write("[")
+        for hero in generate_heroes(count, seed):
+            if hero["id"] > 1:
+                file.write(",")
+            file.write(json.dumps(hero))
+        file.write("]")
+
+
+def write_api_responses(path: str, count: int, seed: int = 0):
+    """Потоковая запись ответов API в файл JSON Lines (строка N — герой с ID N)."""
+
+    with open(path, "w", buffering=1024 * 1024) as file:
+        for hero in generate_heroes(count, seed):
+            file.write(json.dumps(to_api_response(hero)))
+            file.write("\n")
+
+
+def write_change_log(path: str, count: int, events: int, seed: int = 0):
+    """Потоковая запись ленты изменений в файл JSON Lines (см. generate_changes)."""
+
+    with open(path, "w", buffering=1024 * 1024) as file:
+        for event in generate_changes(count, events, seed):
+            file.write(json.dumps(event))
+            file.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация синтетического набора героев")
+    parser.add_argument("--count", type=int, default=731, help="количество героев")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора")
+    parser.add_argument("--all-json", help="путь для файла в формате all.json")
+    parser.add_argument("--api-jsonl", help="путь для ответов API в формате JSON Lines")
+    parser.add_argument("--changes-jsonl", help="путь для ленты изменений в формате JSON Lines")
+    parser.add_argument("--events", type=int, default=0, help="количество изменений после добавления героев")
+    args = parser.parse_args()
+
+    if args.all_json:
+        write_all_json(args.all_json, args.count, args.seed)
+    if args.api_jsonl:
+        write_api_responses(args.api_jsonl, args.count, args.seed)
+    if args.changes_jsonl:
+        write_change_log(args.changes_jsonl, args.count, args.events, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import contextlib
+
+import aiohttp
+import requests
+
+import profiling
+
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = httpx is not None
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_HEADERS = {"Accept-Encoding": ACCEPT_ENCODING}
+
+# Исключения тайм-аута синхронных сессий (requests и httpx).
+TIMEOUT_ERRORS = (requests.Timeout,) + ((httpx.TimeoutException,) if httpx is not None else ())
+
+
+def _check_http2(http2: bool):
+    """Проверка, что для HTTP/2 установлены httpx и h2.
+
+    Исключения:
+        RuntimeError: если HTTP/2 запрошен, но зависимости не установлены.
+    """
+
+    if http2 and not HTTP2_AVAILABLE:
+        raise RuntimeError("Для HTTP/2 необходимо установить пакет httpx[http2]")
+
+
+def create_sync_session(http2: bool = False):
+    """Создание синхронной сессии с поддержкой сжатия ответов.
+
+    По умолчанию используется requests.Session (HTTP/1.1 с keep-alive).
+    При http2=True используется httpx.Client, который мультиплексирует
+    запросы по одному соединению HTTP/2. Обе сессии поддерживают
+    одинаковый интерфейс: get(), status_code, json(), content.
+
+    Параметры:
+        http2 (bool): использовать ли HTTP/2.
+
+    Возвращает:
+        объект сессии, используемый как контекстный менеджер.
+
+    Исключения:
+        RuntimeError: если HTTP/2 запрошен, но httpx[http2] не установлен.
+    """
+
+    _check_http2(http2)
+    if http2:
+        return httpx.Client(http2=True, headers=DEFAULT_HEADERS)
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    profiling.instrument_requests_session(session)
+    return session
+
+
+def use_sync_session(session=None, http2: bool = False):
+    """Переданная сессия или новая (create_sync_session) для блока with.
+
+    Переданная сессия при выходе из блока не закрывается: ею владеет вызывающий код.
+    """
+
+    if session is not None:
+        return contextlib.nullcontext(session)
+    return create_sync_session(http2)
+
+
+class HTTPXResponse:
+    """Ответ httpx с интерфейсом ответа aiohttp (status, json(), read())."""
+
+    def __init__(self, response):
+        self._response = response
+        self.status = response.status_code
+        self.headers = response.headers
+
+    async def read(self) -> bytes:
+        return self._response.content
+
+    async def json(self):
+        return self._response.json()
+
+
+class HTTPXAsyncSession:
+    """Асинхронная сессия httpx с интерфейсом aiohttp.ClientSession.
+
+    Позволяет передавать сессию HTTP/2 в функции, написанные под aiohttp:
+    поддерживаются `async with session` и `async with session.get(url) as response`.
+    """
+
+    def __init__(self, http2: bool = True):
+        # Все запросы героев отправляются разом, поэтому ожидание свободного
+        # соединения в пуле не ограничивается по времени.
+        timeout = httpx.Timeout(10.0, pool=None)
+        self._client = httpx.AsyncClient(http2=http2, headers=DEFAULT_HEADERS, timeout=timeout)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self._client.aclose()
+
+    @contextlib.asynccontextmanager
+    async def get(self, url: str, **kwargs):
+        response = await self._client.get(url, **kwargs)
+        yield HTTPXResponse(response)
+
+
+def create_async_session(http2: bool = False):
+    """Создание асинхронной сессии с поддержкой сжатия ответов.
+
+    Параметры:
+        http2 (bool): использовать ли HTTP/2 (через httpx) вместо aiohttp.
+
+    Возвращает:
+        aiohttp.ClientSession или HTTPXAsyncSession.
+
+    Исключения:
+        RuntimeError: если HTTP/2 запрошен, но httpx[http2] не установлен.
+    """
+
+    _check_http2(http2)
+    if http2:
+        return HTTPXAsyncSession(http2=True)
+    return aiohttp.ClientSession(headers=DEFAULT_HEADERS, trace_configs=profiling.aiohttp_trace_configs())
+
+
+def use_async_session(session=None, http2: bool = False):
+    """Переданная сессия или новая (create_async_session) для блока async with.
+
+    Переданная сессия при выходе из блока не закрывается: ею владеет вызывающий код.
+    """
+
+    if session is not None:
+        return contextlib.nullcontext(session)
+    return create_async_session(http2)
@@ -0,0 +1,180 @@
+import json
+from collections import namedtuple
+from typing import List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+DECODERS = {"json": json.loads}
+if orjson is not None:
+    DECODERS["orjson"] = orjson.loads
+if msgspec is not None:
+    DECODERS["msgspec"] = msgspec.json.decode
+
+DEFAULT_BACKEND = "orjson" if orjson is not None else "msgspec" if msgspec is not None else "json"
+
+# Поля героя, необходимые для поиска: пол, рост в метрической системе и место работы.
+# Место работы хранится как в исходных данных: null (None) считается работой,
+# как и в get_hero_height, а отсутствующее поле — пустой строкой.
+SearchFields = namedtuple("SearchFields", ["gender", "height", "base"])
+# Запись кэша героев: поля поиска и исходный JSON ответа, из которого
+# полный словарь декодируется только для найденного героя (см. materialize).
+CachedHero = namedtuple("CachedHero", ["fields", "content"])
+
+
+def get_decoder(backend: str = None):
+    """Получение функции декодирования JSON.
+
+    Параметры:
+        backend (str): "orjson", "msgspec" или "json". По умолчанию
+        выбирается самый быстрый из установленных.
+
+    Возвращает:
+        функция, принимающая bytes или str и возвращающая объект Python.
+
+    Исключения:
+        ValueError: если backend неизвестен или не установлен.
+    """
+
+    backend = backend or DEFAULT_BACKEND
+    if backend not in DECODERS:
+        raise ValueError(f"Декодер JSON '{backend}' недоступен")
+    return DECODERS[backend]
+
+
+loads = get_decoder()
+
+
+def loads_many(contents: list) -> list:
+    """Декодирование нескольких документов JSON за один вызов декодера.
+
+    Документы объединяются в один массив JSON, поэтому затраты на вызов
+    декодера приходятся на пакет, а не на каждый документ.
+
+    Параметры:
+        contents (list): документы JSON в виде bytes.
+
+    Возвращает:
+        list: декодированные объекты в том же порядке.
+    """
+
+    return loads(b"[" + b",".join(contents) + b"]")
+
+
+def extract_search_fields(hero: dict) -> SearchFields:
+    """Извлечение полей поиска из уже декодированного героя."""
+
+    appearance = hero.get("appearance") or {}
+    height = appearance.get("height") or []
+    return SearchFields(
+        appearance.get("gender"),
+        height[1] if len(height) > 1 else "",
+        (hero.get("work") or {}).get("base", ""),
+    )
+
+
+if msgspec is not None:
+    class _Appearance(msgspec.Struct):
+        gender: Optional[str] = None
+        height: List[str] = msgspec.field(default_factory=list)
+
+    class _Work(msgspec.Struct):
+        base: Optional[str] = ""
+
+    class _HeroSchema(msgspec.Struct):
+        appearance: _Appearance = msgspec.field(default_factory=_Appearance)
+        work: _Work = msgspec.field(default_factory=_Work)
+
+    _hero_decoder = msgspec.json.Decoder(_HeroSchema)
+    _hero_list_decoder = msgspec.json.Decoder(List[_HeroSchema])
+    _raw_list_decoder = msgspec.json.Decoder(List[msgspec.Raw])
+
+    def _schema_to_fields(hero) -> SearchFields:
+        height = hero.appearance.height
+        return SearchFields(
+            hero.appearance.gender,
+            height[1] if len(height) > 1 else "",
+            hero.work.base,
+        )
+
+
+def decode_search_fields(data: bytes) -> SearchFields:
+    """Декодирование только полей поиска из JSON одного героя.
+
+    При установленном msgspec остальные поля не материализуются.
+
+    Параметры:
+        data (bytes): JSON-документ героя.
+
+    Возвращает:
+        SearchFields: пол, рост в метрической системе и место работы.
+    """
+
+    if msgspec is not None:
+        try:
+            return _schema_to_fields(_hero_decoder.decode(data))
+        except msgspec.ValidationError:
+            return extract_search_fields(msgspec.json.decode(data))
+    return extract_search_fields(loads(data))
+
+
+def cache_entries(contents: list) -> list:
+    """Записи кэша для ответов API: поля поиска декодируются одним вызовом на пакет.
+
+    Параметры:
+        contents (list): JSON-документы героев в виде bytes.
+
+    Возвращает:
+        list: CachedHero в том же порядке.
+    """
+
+    contents = [bytes(content) for content in contents]
+    if msgspec is not None:
+        try:
+            heroes = _hero_list_decoder.decode(b"[" + b",".join(contents) + b"]")
+            fields = [_schema_to_fields(hero) for hero in heroes]
+        except msgspec.ValidationError:
+            fields = [decode_search_fields(content) for content in contents]
+    else:
+        fields = [extract_search_fields(hero) for hero in loads_many(contents)]
+    return [CachedHero(hero_fields, content) for hero_fields, content in zip(fields, contents)]
+
+
+def decode_hero_list(data: bytes) -> list:
+    """Декодирование списка героев (all.json) для поиска.
+
+    При установленном msgspec массив разбивается на сырые JSON-фрагменты
+    героев, из которых декодируются только поля поиска. Полный словарь
+    героя получают функцией materialize() лишь для найденного героя.
+
+    Параметры:
+        data (bytes): JSON-массив героев.
+
+    Возвращает:
+        list: список пар (SearchFields, документ героя).
+    """
+
+    if msgspec is not None:
+        try:
+            documents = _raw_list_decoder.decode(data)
+            return [(decode_search_fields(document), document) for document in documents]
+        except msgspec.ValidationError:
+            pass
+    return [(extract_search_fields(hero), hero) for hero in loads(data)]
+
+
+def materialize(document) -> dict:
+    """Получение полного словаря героя из документа decode_hero_list или записи CachedHero."""
+
+    if isinstance(document, dict):
+        return document
+    if isinstance(document, CachedHero):
+        return loads(document.content)
+    return msgspec.json.decode(document)
@@ -0,0 +1,182 @@
+import argparse
+import asyncio
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import aiohttp
+
+# Активный трассировщик. Пока он не установлен, span() ничего не делает.
+active_tracer = None
+
+
+def _track_id() -> int:
+    """ID дорожки в трассе: асинхронная задача или поток."""
+
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return id(task) if task is not None else threading.get_ident()
+
+
+class Tracer:
+    """Сбор интервалов времени (span) и запись их в формате Chrome trace.
+
+    Файл трассы открывается в chrome://tracing или https://ui.perfetto.dev.
+    """
+
+    def __init__(self):
+        self.events = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, started: float, finished: float, **args):
+        """Добавление интервала по значениям time.perf_counter()."""
+
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": (started - self._origin) * 1e6,
+            "dur": (finished - started) * 1e6,
+            "pid": os.getpid(),
+            "tid": _track_id(),
+            "args": args,
+        }
+        with self._lock:
+            self.events.append(event)
+
+    @contextlib.contextmanager
+    def span(self, name: str, **args):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, started, time.perf_counter(), **args)
+
+    def write(self, path: str):
+        """Запись трассы в файл JSON формата Chrome trace."""
+
+        with open(path, "w") as file:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, file)
+
+    def summary(self) -> list:
+        """Суммарное время по именам интервалов.
+
+        Возвращает:
+            list: кортежи (имя, количество, суммарное время в секундах),
+            отсортированные по убыванию времени.
+        """
+
+        totals = defaultdict(lambda: [0, 0.0])
+        for event in self.events:
+            totals[event["name"]][0] += 1
+            totals[event["name"]][1] += event["dur"] / 1e6
+        return sorted(((name, count, total) for name, (count, total) in totals.items()),
+                      key=lambda item: item[2], reverse=True)
+
+
+@contextlib.contextmanager
+def span(name: str, **args):
+    """Интервал трассы, если трассировка включена (см. run с --trace)."""
+
+    if active_tracer is None:
+        yield
+        return
+    with active_tracer.span(name, **args):
+        yield
+
+
+def aiohttp_trace_configs() -> list:
+    """Настройки трассировки aiohttp: время соединения и до первого байта ответа."""
+
+    if active_tracer is None:
+        return []
+    tracer = active_tracer
+
+    async def on_request_start(session, context, params):
+        context.started = time.perf_counter()
+
+    async def on_connection_create_start(session, context, params):
+        context.connect_started = time.perf_counter()
+
+    async def on_connection_create_end(session, context, params):
+        tracer.add("connect", context.connect_started, time.perf_counter())
+
+    async def on_request_end(session, context, params):
+        tracer.add("request", context.started, time.perf_counter(), url=str(params.url))
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_request_end.append(on_request_end)
+    return [trace_config]
+
+
+def instrument_requests_session(session):
+    """Трассировка запросов requests.Session: от отправки до получения заголовков."""
+
+    if active_tracer is None:
+        return
+    tracer = active_tracer
+
+    def on_response(response, *args, **kwargs):
+        finished = time.perf_counter()
+        tracer.add("request", finished - response.elapsed.total_seconds(), finished, url=response.url)
+
+    session.hooks["response"].append(on_response)
+
+
+def parse_args(description: str) -> argparse.Namespace:
+    """Разбор аргументов командной строки --profile и --trace."""
+
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--profile", metavar="PATH", help="записать профиль cProfile (формат pstats)")
+    parser.add_argument("--trace", metavar="PATH", help="записать трассу запросов (формат Chrome trace JSON)")
+    return parser.parse_args()
+
+
+def run(func, args: argparse.Namespace, stream=sys.stderr):
+    """Выполнение функции под профилировщиком и/или с трассировкой.
+
+    Параметры:
+        func: функция без аргументов, выполняющая запрос.
+        args (argparse.Namespace): результат parse_args.
+        stream: поток для вывода сводки.
+
+    Возвращает:
+        результат func().
+    """
+
+    global active_tracer
+    if args.trace:
+        active_tracer = Tracer()
+    profiler = cProfile.Profile() if args.profile else None
+    started = time.perf_counter()
+    try:
+        if profiler is not None:
+            result = profiler.runcall(func)
+        else:
+            result = func()
+    finally:
+        elapsed = time.perf_counter() - started
+        tracer, active_tracer = active_tracer, None
+
+    print(f"Общее время: {elapsed:.3f} с", file=stream)
+    if tracer is not None:
+        tracer.write(args.trace)
+        print(f"Трасса записана в {args.trace}", file=stream)
+        for name, count, total in tracer.summary():
+            print(f"  {name:<10}{count:>8} шт.{total:>10.3f} с", file=stream)
+    if profiler is not None:
+        profiler.dump_stats(args.profile)
+        print(f"Профиль записан в {args.profile}", file=stream)
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(15)
+    return result
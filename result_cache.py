@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "tallest_hero")
+
+
+class ResultCache:
+    """Файловый кэш результатов поиска, общий для всех процессов.
+
+    Результат хранится по ключу (источник, пол, наличие работы) вместе с
+    версией набора данных, для которой он найден. Версия — ETag файла
+    all.json или хэш его содержимого, поэтому при изменении данных старые
+    результаты не используются, а перезаписываются новыми: на каждый запрос
+    источника приходится один файл, и каталог не растёт со сменой версий.
+    Последняя известная версия каждого источника тоже хранится на диске:
+    в течение revalidate_after секунд после проверки повторные запросы
+    обслуживаются без обращения к сети и без обхода героев.
+
+    Файлы записываются атомарно (через временный файл и os.replace),
+    поэтому кэш можно использовать из нескольких процессов одновременно.
+
+    Параметры:
+        directory (str): каталог кэша. По умолчанию RESULT_CACHE_DIR
+        или ~/.cache/tallest_hero.
+        revalidate_after (float): через сколько секунд перепроверять версию.
+    """
+
+    def __init__(self, directory: str = None, revalidate_after: float = 60.0):
+        self.directory = directory or os.getenv("RESULT_CACHE_DIR", DEFAULT_DIRECTORY)
+        self.revalidate_after = revalidate_after
+
+    def _path(self, kind: str, *key) -> str:
+        digest = hashlib.sha256(json.dumps(key).encode()).hexdigest()
+        return os.path.join(self.directory, kind, f"{digest}.json")
+
+    def _read(self, path: str):
+        try:
+            with open(path, "rb") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path: str, value):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as file:
+                json.dump(value, file)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def fresh_version(self, source: str):
+        """Версия источника, если она проверялась не позднее revalidate_after секунд назад.
+
+        Возвращает:
+            str или None: версия набора данных или None, если её нужно перепроверить.
+        """
+
+        state = self._read(self._path("versions", source))
+        if state is None or time.time() - state["checked_at"] > self.revalidate_after:
+            return None
+        return state["version"]
+
+    def save_version(self, source: str, version: str):
+        """Сохранение проверенной версии источника."""
+
+        self._write(self._path("versions", source), {"version": version, "checked_at": time.time()})
+
+    def current_generation(self, source: str) -> str:
+        """Версия для источников без ETag, например API superheroapi.com.
+
+        Новая версия создаётся каждые revalidate_after секунд, поэтому
+        результаты таких источников живут не дольше этого времени.
+        """
+
+        version = self.fresh_version(source)
+        if version is None:
+            version = f"generation:{time.time_ns()}"
+            self.save_version(source, version)
+        return version
+
+    def get(self, source: str, version: str, gender: str, has_job: bool):
+        """Получение сохранённого результата.
+
+        Возвращает:
+            dict или None: найденный герой или None, если результата нет.
+        """
+
+        entry = self._read(self._path("results", source, gender, has_job))
+        if entry is None or entry.get("version") != version:
+            return None
+        return entry["hero"]
+
+    def put(self, source: str, version: str, gender: str, has_job: bool, hero: dict):
+        """Сохранение результата для версии набора данных (вместо результата прежней версии)."""
+
+        self._write(self._path("results", source, gender, has_job), {"version": version, "hero": hero})
+
+
+def content_version(content: bytes) -> str:
+    """Версия набора данных по хэшу содержимого."""
+
+    return "sha256:" + hashlib.sha256(content).hexdigest()
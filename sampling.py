@@ -0,0 +1,54 @@
+import random
+from collections import namedtuple
+
+# Количество равных диапазонов ID, из которых выборка берётся поровну.
+STRATA = 16
+
+# Предварительный результат поиска по выборке героев.
+# hero — самый высокий из проверенных героев, checked и total — количество
+# проверенных и всех ID, confidence — вероятность того, что hero уже
+# является точным ответом, exact — future с точным ответом.
+PreviewResult = namedtuple("PreviewResult", ["hero", "checked", "total", "confidence", "exact"])
+
+
+def stratified_order(start: int, stop: int, strata: int = STRATA, seed=None) -> list:
+    """Порядок обхода ID, любое начало которого — стратифицированная выборка.
+
+    Диапазон start..stop делится на strata равных частей, ID внутри каждой
+    части перемешиваются, а затем части чередуются: первые k * strata ID
+    содержат по k случайных ID из каждой части. Поэтому выборка не
+    смещается, даже если рост героев зависит от их ID.
+
+    Параметры:
+        start (int): первый ID.
+        stop (int): последний ID (включительно).
+        strata (int): количество частей диапазона.
+        seed: начальное значение генератора случайных чисел.
+
+    Возвращает:
+        list: все ID диапазона в порядке обхода.
+    """
+
+    rng = random.Random(seed)
+    ids = list(range(start, stop + 1))
+    strata = max(1, min(strata, len(ids)))
+    size, extra = divmod(len(ids), strata)
+    parts = []
+    position = 0
+    for index in range(strata):
+        part_size = size + (1 if index < extra else 0)
+        part = ids[position:position + part_size]
+        rng.shuffle(part)
+        parts.append(part)
+        position += part_size
+    return [part[step] for step in range(size + 1) for part in parts if step < len(part)]
+
+
+def confidence(checked: int, total: int) -> float:
+    """Вероятность того, что самый высокий герой выборки — самый высокий среди всех.
+
+    Каждый ID попадает в выборку из checked ID с вероятностью checked / total,
+    в том числе и ID точного ответа.
+    """
+
+    return checked / total if total else 1.0
@@ -0,0 +1,348 @@
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+import warnings
+from multiprocessing.managers import BaseManager
+
+from bounded_cache import BoundedCache
+
+SHARED_CACHE_ADDRESS = os.getenv("HERO_SHARED_CACHE")
+SHARED_CACHE_AUTHKEY = os.getenv("HERO_SHARED_CACHE_AUTHKEY", "tallest-hero").encode()
+# Сколько секунд другие процессы ждут запись, которую загружает один из них.
+CLAIM_TIMEOUT = 10.0
+
+
+class SharedStore:
+    """Хранилище общего кэша внутри процесса-демона.
+
+    Поверх BoundedCache добавлено однократное получение (single flight):
+    первый процесс, не нашедший запись, получает право загрузить её, а
+    остальные процессы ждут, пока запись не будет сохранена или пока не
+    истечёт claim_timeout секунд.
+
+    Параметры:
+        cache (BoundedCache): кэш записей.
+        claim_timeout (float): время ожидания записи, загружаемой другим процессом.
+    """
+
+    def __init__(self, cache: BoundedCache, claim_timeout: float = CLAIM_TIMEOUT):
+        self._cache = cache
+        self.claim_timeout = claim_timeout
+        self._claims = {}
+        self._condition = threading.Condition()
+        self.waits = 0
+
+    def get(self, key, owner, wait: bool = True, timeout: float = None):
+        """Получение записи.
+
+        Если записи нет, ключ закрепляется за owner, и тот должен загрузить
+        и сохранить её. Если ключ закреплён за другим владельцем, при
+        wait=True вызов ждёт сохранения записи не дольше claim_timeout
+        или timeout секунд. Если timeout истёк раньше закрепления другого
+        владельца, ключ не перезакрепляется. При wait=False вызов не ждёт
+        и не закрепляет ключ.
+
+        Возвращает:
+            значение записи или None, если её нужно загрузить.
+        """
+
+        if not wait:
+            with self._condition:
+                return self._cache.get(key)
+        return self.get_many([key], owner, timeout).get(key)
+
+    def set(self, key, value, ttl: float = None):
+        with self._condition:
+            self._cache.set(key, value, ttl)
+            self._claims.pop(key, None)
+            self._condition.notify_all()
+
+    def get_many(self, keys, owner=None, timeout: float = None) -> dict:
+        """Найденные записи для нескольких ключей.
+
+        Без owner вызов не ждёт и не закрепляет ключи. С owner он работает
+        как get для каждого ключа: ждёт ключи, которые загружают другие
+        владельцы, а остальные отсутствующие ключи закрепляет за owner.
+
+        Возвращает:
+            dict: найденные записи; отсутствующие ключи нужно загрузить.
+        """
+
+        with self._condition:
+            found = self._cache.get_many(keys)
+            if owner is None:
+                return found
+            wait_for = self.claim_timeout if timeout is None else min(timeout, self.claim_timeout)
+            deadline = time.monotonic() + wait_for
+            missing = [key for key in keys if key not in found]
+            while True:
+                now = time.monotonic()
+                expires = [self._claims[key][1] for key in missing if self._claimed_by_other(key, owner, now)]
+                if not expires or deadline <= now:
+                    break
+                self.waits += 1
+                self._condition.wait(min(deadline, min(expires)) - now)
+                found.update(self._cache.get_many(missing))
+                missing = [key for key in missing if key not in found]
+            now = time.monotonic()
+            for key in missing:
+                if not self._claimed_by_other(key, owner, now):
+                    self._claims[key] = (owner, now + self.claim_timeout)
+            return found
+
+    def _claimed_by_other(self, key, owner, now: float) -> bool:
+        claim = self._claims.get(key)
+        return claim is not None and claim[0] != owner and claim[1] > now
+
+    def set_many(self, items: dict):
+        with self._condition:
+            self._cache.set_many(items)
+            for key in items:
+                self._claims.pop(key, None)
+            self._condition.notify_all()
+
+    def release(self, key, owner):
+        """Отказ от загрузки записи, например после ошибки запроса."""
+
+        self.release_many([key], owner)
+
+    def release_many(self, keys, owner):
+        """Отказ от загрузки нескольких записей; чужие закрепления не снимаются."""
+
+        with self._condition:
+            for key in keys:
+                if self._claims.get(key, (None,))[0] == owner:
+                    del self._claims[key]
+            self._condition.notify_all()
+
+    def contains(self, key) -> bool:
+        return key in self._cache
+
+    def delete(self, key):
+        with self._condition:
+            del self._cache[key]
+
+    def size(self) -> int:
+        return len(self._cache)
+
+    def clear(self):
+        with self._condition:
+            self._cache.clear()
+            self._claims.clear()
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        with self._condition:
+            return dict(self._cache.stats(), waits=self.waits, claims=len(self._claims))
+
+
+class _CacheManager(BaseManager):
+    pass
+
+
+_CacheManager.register("store")
+
+
+class SharedCache:
+    """Кэш, общий для всех процессов на машине.
+
+    Записи хранятся в процессе-демоне (см. serve), с которым процессы
+    связываются через Unix-сокет. Работает как словарь, поэтому заменяет
+    BoundedCache в get_hero_info: каталог героев загружается один раз на
+    машину, а не в каждом процессе.
+
+    get и get_many ждут записи, которые уже загружает другой процесс.
+    Процесс, для которого get вернул None (или get_many не вернул ключ),
+    должен сохранить запись (cache[key] = value, set_many) или отказаться
+    от неё (release, release_many), иначе остальные ждут CLAIM_TIMEOUT.
+
+    Параметры:
+        address (str): путь к Unix-сокету демона.
+        authkey (bytes): ключ аутентификации.
+
+    Исключения:
+        OSError: если демон недоступен.
+    """
+
+    def __init__(self, address: str, authkey: bytes = SHARED_CACHE_AUTHKEY):
+        manager = _CacheManager(address=address, authkey=authkey)
+        manager.connect()
+        self.address = address
+        self._store = manager.store()
+
+    @property
+    def _owner(self) -> int:
+        # Процесс не ждёт сам себя: ключ, закреплённый за ним, он загружает повторно.
+        return os.getpid()
+
+    def get(self, key, default=None, timeout: float = None):
+        value = self._store.get(key, self._owner, True, timeout)
+        return value if value is not None else default
+
+    def __getitem__(self, key):
+        value = self._store.get(key, self._owner, False)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._store.set(key, value)
+
+    def set(self, key, value, ttl: float = None):
+        self._store.set(key, value, ttl)
+
+    def get_many(self, keys) -> dict:
+        """Найденные записи для нескольких ключей за одно обращение к демону.
+
+        Отсутствующие ключи закрепляются за процессом, как в get.
+        """
+
+        return self._store.get_many(list(keys), self._owner)
+
+    def set_many(self, items: dict):
+        self._store.set_many(dict(items))
+
+    def release(self, key):
+        self._store.release(key, self._owner)
+
+    def release_many(self, keys):
+        self._store.release_many(list(keys), self._owner)
+
+    def __contains__(self, key) -> bool:
+        return self._store.contains(key)
+
+    def __delitem__(self, key):
+        self._store.delete(key)
+
+    def __len__(self) -> int:
+        return self._store.size()
+
+    def clear(self):
+        self._store.clear()
+
+    def stats(self) -> dict:
+        """Статистика кэша демона и количество ожиданий загрузки другими процессами."""
+
+        return self._store.stats()
+
+
+def release_claim(cache, key):
+    """Отказ от загрузки записи после ошибки, если кэш закрепляет ключи (SharedCache).
+
+    Без этого другие процессы ждали бы ключ CLAIM_TIMEOUT секунд.
+    """
+
+    release = getattr(cache, "release", None)
+    if release is not None:
+        release(key)
+
+
+def release_claims(cache, keys):
+    """Отказ от загрузки нескольких записей после ошибки (см. release_claim)."""
+
+    release_many = getattr(cache, "release_many", None)
+    if release_many is not None:
+        release_many(list(keys))
+
+
+def get_within(cache, key, timeout: float = None):
+    """Получение записи кэша с ожиданием не дольше timeout секунд.
+
+    SharedCache.get ждёт запись, которую загружает другой процесс, до
+    CLAIM_TIMEOUT секунд; здесь ожидание ограничивается timeout. Остальные
+    кэши не ждут, для них это обычный get.
+    """
+
+    if timeout is not None and isinstance(cache, SharedCache):
+        return cache.get(key, timeout=timeout)
+    return cache.get(key)
+
+
+def connect_from_env():
+    """Подключение к общему кэшу по переменной окружения HERO_SHARED_CACHE.
+
+    Возвращает:
+        SharedCache или None, если общий кэш не настроен или демон недоступен.
+    """
+
+    if not SHARED_CACHE_ADDRESS:
+        return None
+    try:
+        return SharedCache(SHARED_CACHE_ADDRESS)
+    except OSError as error:
+        warnings.warn(f"Общий кэш {SHARED_CACHE_ADDRESS} недоступен, используется локальный: {error}")
+        return None
+
+
+def hero_cache_from_env(default_max_entries: int = None):
+    """Кэш героев для get_hero_info: общий, если он настроен, иначе BoundedCache.from_env."""
+
+    shared = connect_from_env()
+    return shared if shared is not None else BoundedCache.from_env(default_max_entries)
+
+
+def create_server(address: str, authkey: bytes = SHARED_CACHE_AUTHKEY, cache: BoundedCache = None):
+    """Создание сервера общего кэша.
+
+    Параметры:
+        address (str): путь к Unix-сокету.
+        authkey (bytes): ключ аутентификации.
+        cache (BoundedCache): хранилище, по умолчанию BoundedCache.from_env().
+
+    Возвращает:
+        сервер multiprocessing.managers; serve_forever() обслуживает клиентов.
+    """
+
+    store = SharedStore(cache if cache is not None else BoundedCache.from_env())
+
+    class _ServerManager(_CacheManager):
+        pass
+
+    _ServerManager.register("store", callable=lambda: store)
+    return _ServerManager(address=address, authkey=authkey).get_server()
+
+
+def serve(address: str, authkey: bytes = SHARED_CACHE_AUTHKEY):
+    """Запуск демона общего кэша (блокирует до завершения процесса)."""
+
+    if os.path.exists(address):
+        os.unlink(address)
+    create_server(address, authkey).serve_forever()
+
+
+def start_daemon(address: str, authkey: bytes = SHARED_CACHE_AUTHKEY, timeout: float = 5.0):
+    """Запуск демона общего кэша в отдельном процессе (как `python shared_cache.py`).
+
+    Возвращает:
+        subprocess.Popen: процесс демона, остановить его можно через terminate().
+
+    Исключения:
+        RuntimeError: если демон не начал принимать подключения за timeout секунд.
+    """
+
+    env = dict(os.environ, HERO_SHARED_CACHE_AUTHKEY=authkey.decode())
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--address", address], env=env)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            SharedCache(address, authkey)
+            return process
+        except OSError:
+            time.sleep(0.01)
+    process.terminate()
+    raise RuntimeError(f"Демон общего кэша не запустился: {address}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Демон общего кэша героев")
+    parser.add_argument("--address", default=SHARED_CACHE_ADDRESS or "/tmp/tallest-hero-cache.sock",
+                        help="путь к Unix-сокету")
+    args = parser.parse_args()
+    serve(args.address)
+
+
+if __name__ == "__main__":
+    main()
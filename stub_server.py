@@ -0,0 +1,173 @@
+import gzip
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from generate_heroes import to_api_response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+API_PATH = re.compile(r"^/api/[^/]+/(\d+)$")
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        if self.path != "/all.json":
+            self._send(404, b"", None)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.server.stub.all_json)))
+        self.send_header("ETag", self.server.stub.etag)
+        self.end_headers()
+        self.server.stub.record(0)
+
+    def do_GET(self):
+        stub = self.server.stub
+        match = API_PATH.match(self.path)
+        if self.path == "/all.json":
+            body = stub.all_json
+        elif match and int(match.group(1)) in stub.heroes_by_id:
+            if not stub.enter_api_request():
+                self._send(429, b'{"response": "error", "error": "too many requests"}', None)
+                return
+            try:
+                time.sleep(stub.latency)
+            finally:
+                stub.leave_api_request()
+            body = stub.hero_json(int(match.group(1)))
+        else:
+            self._send(404, b'{"response": "error"}', None)
+            return
+
+        accepted = self.headers.get("Accept-Encoding", "")
+        encoding = None
+        if "br" in accepted and brotli is not None:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+        self._send(200, stub.encoded(self.path, body, encoding), encoding)
+
+    def _send(self, status: int, body: bytes, encoding):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.path == "/all.json" and status == 200:
+            self.send_header("ETag", self.server.stub.etag)
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        self.server.stub.record(len(body))
+        self.wfile.write(body)
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class StubServer:
+    """Локальная заглушка для all.json и API superheroapi.com.
+
+    Отдаёт all.json по пути /all.json и героев по пути /api/<token>/<id>,
+    поддерживает keep-alive, сжатие gzip/brotli и ETag для all.json.
+    Считает количество запросов и переданных байт тела ответа, что
+    используется в бенчмарках.
+
+    Для проверки адаптивного ограничения запросов у API можно задать
+    задержку ответа (latency) и количество одновременно обслуживаемых
+    запросов (capacity): сверх него заглушка отвечает 429.
+
+    Параметры:
+        heroes (list): список героев в формате all.json (с полем "id").
+    """
+
+    def __init__(self, heroes: list, host: str = "127.0.0.1", port: int = 0):
+        self.set_heroes(heroes)
+        self._lock = threading.Lock()
+        self.requests_count = 0
+        self.bytes_sent = 0
+        self.latency = 0.0
+        self.capacity = None
+        self.api_in_flight = 0
+        self.max_api_in_flight = 0
+        self.rejected_count = 0
+        self._server = _StubHTTPServer((host, port), _StubHandler)
+        self._server.stub = self
+        self._thread = None
+
+    def set_heroes(self, heroes: list):
+        """Замена набора героев (меняет ETag all.json)."""
+
+        self.heroes_by_id = {hero["id"]: hero for hero in heroes}
+        self.all_json = json.dumps(heroes).encode()
+        self.etag = '"' + hashlib.sha256(self.all_json).hexdigest()[:16] + '"'
+        self._encoded = {}
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def hero_json(self, character_id: int) -> bytes:
+        return json.dumps(to_api_response(self.heroes_by_id[character_id])).encode()
+
+    def encoded(self, path: str, body: bytes, encoding) -> bytes:
+        if encoding is None:
+            return body
+        key = (path, encoding)
+        if key not in self._encoded:
+            self._encoded[key] = brotli.compress(body, quality=5) if encoding == "br" else gzip.compress(body)
+        return self._encoded[key]
+
+    def record(self, size: int):
+        with self._lock:
+            self.requests_count += 1
+            self.bytes_sent += size
+
+    def enter_api_request(self) -> bool:
+        with self._lock:
+            if self.capacity is not None and self.api_in_flight >= self.capacity:
+                self.rejected_count += 1
+                return False
+            self.api_in_flight += 1
+            self.max_api_in_flight = max(self.max_api_in_flight, self.api_in_flight)
+            return True
+
+    def leave_api_request(self):
+        with self._lock:
+            self.api_in_flight -= 1
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests_count = 0
+            self.bytes_sent = 0
+            self.max_api_in_flight = 0
+            self.rejected_count = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -1,20 +1,48 @@
 import os
 import pprint
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 from dotenv import load_dotenv
 
+import profiling
+from http_backend import DEFAULT_HEADERS, TIMEOUT_ERRORS, create_sync_session, use_sync_session
+from json_decoder import CachedHero, SearchFields, cache_entries, decode_search_fields, materialize
+from result_cache import ResultCache
+from sampling import PreviewResult, confidence, stratified_order
+from shared_cache import get_within, hero_cache_from_env, release_claim, release_claims
+
 load_dotenv()
 ACCESS_TOKEN = os.getenv("ACCESS_TOKEN")
+API_URL = os.getenv("API_URL", "https://superheroapi.com/api")
 
 START_ID = 1
 MAX_ID = 731
-hero_cache = {}
+CHUNK_SIZE = 25
+CONNECTIONS = 8
+PREVIEW_BUDGET = 0.5
+hero_cache = hero_cache_from_env(default_max_entries=MAX_ID)
+result_cache = ResultCache()
+
+# Результат поиска с ограничением по времени: герой и признак полного обхода.
+QueryResult = namedtuple("QueryResult", ["hero", "is_complete"])
 
-def get_hero_info(character_id: int) -> dict:
+def get_hero_info(character_id: int, session=None, timeout: float = None, cache=None) -> dict:
     """Получение информации о герое по его ID.
     
     Параметры:
         character_id (int): ID героя, информацию о котором необходимо получить.
+        session: сессия requests/httpx для повторного использования соединения.
+        Если не передана, используется requests.get.
+        timeout (float): тайм-аут запроса в секундах (None — без ограничения).
+        cache: кэш героев, по умолчанию hero_cache.
+
+    В кэше хранится исходный JSON ответа с полями поиска (CachedHero),
+    словарь декодируется из него при каждом вызове. Поиск героев
+    сравнивает только поля поиска (см. _get_hero_entry).
 
     Возвращает:
         dict: информация о герое в виде словаря.
@@ -23,16 +51,100 @@ def get_hero_info(character_id: int) -> dict:
         RuntimeError: если возникает ошибка при получении информации о герое.
     """
         
-    if character_id in hero_cache:
-        return hero_cache[character_id]
+    cached_hero = _get_hero_entry(character_id, session, timeout, cache)
+    with profiling.span("decode", id=character_id):
+        return materialize(cached_hero)
+
+def _get_hero_entry(character_id: int, session=None, timeout: float = None, cache=None) -> CachedHero:
+    # Запись кэша героя; при промахе из ответа декодируются только поля поиска.
+    # timeout ограничивает ожидание общего кэша и запрос вместе.
+    cache = cache if cache is not None else hero_cache
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    cached_hero = get_within(cache, character_id, timeout)
+    if cached_hero is not None:
+        return cached_hero
+
+    try:
+        if deadline is not None:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                raise requests.Timeout(f"Истекло время ожидания героя с ID {character_id}")
+        content = _fetch_hero_content(character_id, session, timeout)
+        with profiling.span("decode", id=character_id):
+            cached_hero = CachedHero(decode_search_fields(content), bytes(content))
+    except BaseException:
+        # Ошибка запроса: другие процессы не должны ждать этого героя.
+        release_claim(cache, character_id)
+        raise
+    cache[character_id] = cached_hero
+    return cached_hero
+
+def _fetch_hero_content(character_id: int, session=None, timeout: float = None) -> bytes:
+    client = session if session is not None else requests
+    response = client.get(
+        f"{API_URL}/{ACCESS_TOKEN}/{character_id}", headers=DEFAULT_HEADERS, timeout=timeout
+    )
+    if response.status_code == 200:
+        return response.content
     else:
-        response = requests.get(f"https://superheroapi.com/api/{ACCESS_TOKEN}/{character_id}")
-        if response.status_code == 200:
-            hero_info = response.json()
-            hero_cache[character_id] = hero_info
-            return hero_info
-        else:
-            raise RuntimeError(f"Ошибка при получении информации о герое с ID {character_id}: {response.status_code}")
+        raise RuntimeError(f"Ошибка при получении информации о герое с ID {character_id}: {response.status_code}")
+
+def iter_hero_batches(ids: list, chunk_size: int = CHUNK_SIZE, connections: int = CONNECTIONS,
+                      http2: bool = False, cache=None):
+    """Получение героев пакетами в нескольких потоках.
+
+    ID делятся на пакеты по chunk_size. Каждый из connections потоков
+    загружает ID своего пакета по очереди через собственную сессию с
+    постоянным соединением, а затем одним вызовом декодирует поля поиска
+    пакета и один раз записывает его в кэш. Пакеты возвращаются в порядке ID.
+
+    Параметры:
+        ids (list): ID героев.
+        chunk_size (int): размер пакета.
+        connections (int): количество потоков и соединений.
+        http2 (bool): использовать HTTP/2 (требуется httpx[http2]).
+        cache: кэш героев, по умолчанию hero_cache.
+
+    Возвращает:
+        генератор списков пар (ID, CachedHero). Полный словарь героя
+        возвращает json_decoder.materialize.
+
+    Исключения:
+        RuntimeError: если возникает ошибка при получении информации о герое.
+    """
+
+    cache = cache if cache is not None else hero_cache
+    local = threading.local()
+    sessions = []
+    sessions_lock = threading.Lock()
+
+    def fetch_batch(chunk: list) -> list:
+        if not hasattr(local, "session"):
+            local.session = create_sync_session(http2)
+            with sessions_lock:
+                sessions.append(local.session)
+        found = cache.get_many(chunk)
+        missing = [current_id for current_id in chunk if current_id not in found]
+        if missing:
+            try:
+                contents = [_fetch_hero_content(current_id, local.session) for current_id in missing]
+                with profiling.span("decode", heroes=len(missing)):
+                    fetched = dict(zip(missing, cache_entries(contents)))
+            except BaseException:
+                # Общий кэш закрепил отсутствующих героев за процессом: другие не должны их ждать.
+                release_claims(cache, missing)
+                raise
+            cache.set_many(fetched)
+            found.update(fetched)
+        return [(current_id, found[current_id]) for current_id in chunk]
+
+    chunks = [ids[start:start + chunk_size] for start in range(0, len(ids), chunk_size)]
+    try:
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            yield from executor.map(fetch_batch, chunks)
+    finally:
+        for session in sessions:
+            session.close()
 
 def convert_height_to_cm(height: str) -> int:
     """Преобразование роста из метров или сантиметров в сантиметры.
@@ -57,7 +169,96 @@ def convert_height_to_cm(height: str) -> int:
         else:
             raise ValueError("Неизвестный формат роста")
 
-def get_tallest_hero(gender: str, has_job: bool) -> dict:
+def get_hero_height(hero: dict, gender: str, has_job: bool):
+    """Рост героя в сантиметрах, если он подходит под критерии поиска.
+
+    Возвращает:
+        int или None: рост героя или None, если герой не подходит
+        или его рост указан некорректно.
+    """
+
+    base = hero.get("work", {}).get("base", "")
+    if has_job:
+        is_base_valid = base not in ["-", ""]
+    else:
+        is_base_valid = base in ["", "-"]
+    if hero["appearance"]["gender"] != gender or not is_base_valid:
+        return None
+    try:
+        return convert_height_to_cm(hero["appearance"]["height"][1])
+    except ValueError:
+        return None
+
+def get_fields_height(fields: SearchFields, gender: str, has_job: bool):
+    """Рост героя по полям поиска (см. get_hero_height) без декодирования всего героя."""
+
+    if fields.gender != gender or (fields.base not in ["-", ""]) != has_job:
+        return None
+    try:
+        return convert_height_to_cm(fields.height)
+    except ValueError:
+        return None
+
+def _is_taller(current_height: int, current_id: int, max_height: int, tallest_id) -> bool:
+    # При равном росте выбирается герой с меньшим ID, как при последовательном обходе.
+    is_tie = tallest_id is not None and current_height == max_height
+    return current_height > max_height or (is_tie and current_id < tallest_id)
+
+def get_tallest_hero_within(gender: str, has_job: bool, timeout: float = None, http2: bool = False,
+                            session=None, cache=None) -> QueryResult:
+    """Поиск самого высокого супергероя с ограничением по времени.
+
+    Каждый запрос и ожидание общего кэша получают тайм-аут, равный
+    оставшемуся времени. requests применяет тайм-аут к каждому чтению из
+    сокета, а не ко всему ответу, поэтому срок проверяется и после каждого
+    запроса: герой, полученный позже срока, не учитывается. Если время
+    истекло, обход прекращается, сессия закрывается, а возвращается лучший
+    из уже проверенных героев.
+    Герои сравниваются по полям поиска, полностью декодируется только найденный.
+
+    Параметры:
+        gender (str): пол супергероя ("Male" или "Female").
+        has_job (bool): наличие работы у супергероя (True) или нет (False).
+        timeout (float): ограничение времени в секундах (None — без ограничения).
+        http2 (bool): использовать HTTP/2 (требуется httpx[http2]).
+        session: сессия для запросов; если не передана, создаётся новая
+        с учётом http2. Переданная сессия не закрывается.
+        cache: кэш героев, по умолчанию hero_cache.
+
+    Возвращает:
+        QueryResult: самый высокий герой (или пустой словарь) и признак
+        is_complete — были ли проверены все герои.
+    """
+
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    tallest_hero = None
+    max_height = 0
+    is_complete = True
+
+    with use_sync_session(session, http2) as session:
+        for current_id in range(START_ID, MAX_ID+1):
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                is_complete = False
+                break
+            try:
+                current_hero = _get_hero_entry(current_id, session, timeout=remaining, cache=cache)
+            except TIMEOUT_ERRORS:
+                is_complete = False
+                break
+            if deadline is not None and time.monotonic() > deadline:
+                is_complete = False
+                break
+            with profiling.span("filter", id=current_id):
+                current_height = get_fields_height(current_hero.fields, gender, has_job)
+                if current_height is not None and current_height > max_height:
+                    max_height = current_height
+                    tallest_hero = current_hero
+
+    with profiling.span("decode"):
+        return QueryResult(materialize(tallest_hero) if tallest_hero is not None else {}, is_complete)
+
+def get_tallest_hero(gender: str, has_job: bool, http2: bool = False, session=None, cache=None) -> dict:
     """Поиск самого высокого супергероя по полу и наличию работы.
 
     Если герой не имеет места работы (base) или оно указано как '-',
@@ -68,37 +269,152 @@ def get_tallest_hero(gender: str, has_job: bool) -> dict:
     Параметры:
         gender (str): пол супергероя ("Male" или "Female").
         has_job (bool): наличие работы у супергероя (True) или нет (False).
+        http2 (bool): использовать HTTP/2 (требуется httpx[http2]).
+        session: сессия для запросов; если не передана, создаётся новая
+        с учётом http2. Переданная сессия не закрывается.
+        cache: кэш героев, по умолчанию hero_cache.
 
     Возвращает:
         dict: Словарь с информацией о самом высоком супергерое или
         пустой словарь, если героев не найдено.
     """
-    
-    tallest_hero_id = None
-    max_height = 0
 
-    for current_id in range(START_ID, MAX_ID+1):
-        current_hero = get_hero_info(current_id)
-        base = current_hero.get("work", {}).get("base", "")
-        if has_job:
-            is_base_valid = base not in ["-", ""]
-        else:
-            is_base_valid = base in ["", "-"]
-        if current_hero["appearance"]["gender"] == gender and is_base_valid:
-            try:
-                current_height = convert_height_to_cm(current_hero["appearance"]["height"][1])
-                if current_height > max_height:
+    return get_tallest_hero_within(gender, has_job, http2=http2, session=session, cache=cache).hero
+
+def get_tallest_hero_preview(gender: str, has_job: bool, budget: float = PREVIEW_BUDGET,
+                             sample_size: int = None, http2: bool = False, seed=None,
+                             session=None, cache=None) -> PreviewResult:
+    """Быстрый предварительный поиск самого высокого супергероя по выборке.
+
+    Герои проверяются в фоновом потоке в порядке sampling.stratified_order,
+    поэтому первые проверенные герои — случайная выборка из всего диапазона
+    ID. Через budget секунд (или после проверки sample_size героев)
+    возвращается самый высокий из уже проверенных героев, а поток
+    продолжает обход до точного ответа, совпадающего с get_tallest_hero.
+
+    Параметры:
+        gender (str): пол супергероя ("Male" или "Female").
+        has_job (bool): наличие работы у супергероя (True) или нет (False).
+        budget (float): время ожидания предварительного ответа в секундах
+        (None — без ограничения).
+        sample_size (int): количество героев, после проверки которых
+        предварительный ответ возвращается раньше budget.
+        http2 (bool): использовать HTTP/2 (требуется httpx[http2]).
+        seed: начальное значение генератора случайной выборки.
+        session: сессия для запросов фонового потока; если не передана,
+        создаётся новая с учётом http2. Переданную сессию нельзя
+        использовать в других потоках и закрывать до получения exact.
+        cache: кэш героев, по умолчанию hero_cache.
+
+    Возвращает:
+        PreviewResult: предварительный герой (или пустой словарь), число
+        проверенных и всех героев, оценка достоверности и
+        concurrent.futures.Future exact с точным ответом.
+
+    Исключения:
+        RuntimeError: если запрос завершился ошибкой до предварительного ответа.
+    """
+
+    order = stratified_order(START_ID, MAX_ID, seed=seed)
+    best = {"hero": None, "id": None, "height": 0, "checked": 0}
+    lock = threading.Lock()
+    sampled = threading.Event()
+
+    def as_dict(hero) -> dict:
+        with profiling.span("decode"):
+            return materialize(hero) if hero is not None else {}
+
+    def refine() -> dict:
+        try:
+            with use_sync_session(session, http2) as refine_session:
+                for current_id in order:
+                    current_hero = _get_hero_entry(current_id, refine_session, cache=cache)
+                    with profiling.span("filter", id=current_id):
+                        current_height = get_fields_height(current_hero.fields, gender, has_job)
+                    with lock:
+                        if current_height is not None and _is_taller(current_height, current_id,
+                                                                     best["height"], best["id"]):
+                            best.update(hero=current_hero, id=current_id, height=current_height)
+                        best["checked"] += 1
+                    if sample_size is not None and best["checked"] >= sample_size:
+                        sampled.set()
+            return as_dict(best["hero"])
+        finally:
+            sampled.set()
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    exact = executor.submit(refine)
+    executor.shutdown(wait=False)
+    sampled.wait(budget)
+    if exact.done():
+        exact.result()
+    with lock:
+        hero, checked = best["hero"], best["checked"]
+    return PreviewResult(as_dict(hero), checked, len(order), confidence(checked, len(order)), exact)
+
+def get_tallest_hero_batched(gender: str, has_job: bool, chunk_size: int = CHUNK_SIZE,
+                             connections: int = CONNECTIONS, http2: bool = False, cache=None) -> dict:
+    """Поиск самого высокого супергероя с загрузкой героев пакетами.
+
+    Результат совпадает с get_tallest_hero, но герои загружаются
+    одновременно через iter_hero_batches. Герои сравниваются по полям
+    поиска, полностью декодируется только найденный.
+
+    Параметры:
+        gender (str): пол супергероя ("Male" или "Female").
+        has_job (bool): наличие работы у супергероя (True) или нет (False).
+        chunk_size (int): размер пакета.
+        connections (int): количество потоков и соединений.
+        http2 (bool): использовать HTTP/2 (требуется httpx[http2]).
+        cache: кэш героев, по умолчанию hero_cache.
+
+    Возвращает:
+        dict: Словарь с информацией о самом высоком супергерое или
+        пустой словарь, если героев не найдено.
+    """
+
+    tallest_hero = None
+    max_height = 0
+    for batch in iter_hero_batches(list(range(START_ID, MAX_ID + 1)), chunk_size, connections, http2, cache):
+        with profiling.span("filter", heroes=len(batch)):
+            for _, current_hero in batch:
+                current_height = get_fields_height(current_hero.fields, gender, has_job)
+                if current_height is not None and current_height > max_height:
                     max_height = current_height
-                    tallest_hero_id = current_id
-            except ValueError:
-                continue
+                    tallest_hero = current_hero
+    with profiling.span("decode"):
+        return materialize(tallest_hero) if tallest_hero is not None else {}
+
+def get_tallest_hero_cached(gender: str, has_job: bool, http2: bool = False, cache: ResultCache = None) -> dict:
+    """Поиск самого высокого супергероя с кэшированием результата.
+
+    API не сообщает версию данных, поэтому результат хранится в файловом
+    кэше не дольше cache.revalidate_after секунд (см. ResultCache.current_generation).
+    Повторные запросы в этот период не обращаются к сети.
+
+    Параметры:
+        gender (str): пол супергероя ("Male" или "Female").
+        has_job (bool): наличие работы у супергероя (True) или нет (False).
+        http2 (bool): использовать HTTP/2 (требуется httpx[http2]).
+        cache (ResultCache): кэш результатов, по умолчанию result_cache.
+
+    Возвращает:
+        dict: Словарь с информацией о самом высоком супергерое или
+        пустой словарь, если героев не найдено.
+    """
 
-    if tallest_hero_id is not None:
-        return get_hero_info(tallest_hero_id)
-    return {}
+    cache = cache if cache is not None else result_cache
+    version = cache.current_generation(API_URL)
+    cached_hero = cache.get(API_URL, version, gender, has_job)
+    if cached_hero is not None:
+        return cached_hero
+    hero = get_tallest_hero(gender, has_job, http2)
+    cache.put(API_URL, version, gender, has_job, hero)
+    return hero
 
 def main():
-    result = get_tallest_hero("Male", True)
+    args = profiling.parse_args("Поиск самого высокого супергероя через API (синхронно)")
+    result = profiling.run(lambda: get_tallest_hero("Male", True), args)
     print('итог')
     pprint.pprint(result)
 
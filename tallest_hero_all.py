@@ -1,8 +1,20 @@
+import os
 import pprint
 import requests
 
+import profiling
+from http_backend import DEFAULT_HEADERS, create_sync_session
+from json_decoder import decode_hero_list, loads, materialize
+from result_cache import ResultCache, content_version
+from shared_cache import connect_from_env, release_claim
+
+ALL_HEROES_URL = os.getenv("ALL_HEROES_URL", "https://akabab.github.io/superhero-api/api/all.json")
 START_ID = 1
 MAX_ID = 731
+ALL_HEROES_SHARED_TTL = 60.0
+result_cache = ResultCache()
+# Общий для процессов кэш содержимого all.json (None, если HERO_SHARED_CACHE не задан).
+shared_cache = connect_from_env()
 
 def convert_height_to_cm(height: str) -> int:
     """Преобразование роста из метров или сантиметров в сантиметры.
@@ -28,7 +40,107 @@ def convert_height_to_cm(height: str) -> int:
         else:
             raise ValueError("Неизвестный формат роста")
 
-def get_tallest_hero(gender: str, has_job: bool) -> dict:
+def fetch_all_heroes_raw(session=None) -> bytes:
+    """Загрузка файла all.json без декодирования.
+
+    Запрос отправляется с заголовком Accept-Encoding, поэтому файл
+    передаётся в сжатом виде (gzip или brotli).
+
+    Если настроен общий кэш (HERO_SHARED_CACHE), файл загружается одним
+    процессом на машину и хранится в кэше ALL_HEROES_SHARED_TTL секунд.
+
+    Параметры:
+        session: сессия requests/httpx (см. http_backend.create_sync_session).
+        Если не передана, используется requests.get.
+
+    Возвращает:
+        bytes: содержимое all.json.
+
+    Исключения:
+        RuntimeError: если сервер ответил статусом, отличным от 200.
+    """
+
+    key = ("all.json", ALL_HEROES_URL)
+    if shared_cache is not None:
+        content = shared_cache.get(key)
+        if content is not None:
+            return content
+    client = session if session is not None else requests
+    try:
+        response = client.get(ALL_HEROES_URL, headers=DEFAULT_HEADERS)
+    except BaseException:
+        release_claim(shared_cache, key)
+        raise
+    if response.status_code != 200:
+        release_claim(shared_cache, key)
+        raise RuntimeError(f"Ошибка при загрузке all.json: {response.status_code}")
+    if shared_cache is not None:
+        shared_cache.set(key, response.content, ttl=ALL_HEROES_SHARED_TTL)
+    return response.content
+
+def fetch_all_heroes(session=None) -> list:
+    """Загрузка списка всех героев из файла all.json.
+
+    Параметры:
+        session: сессия requests/httpx (необязательно).
+
+    Возвращает:
+        list: список словарей с информацией о героях.
+    """
+
+    return loads(fetch_all_heroes_raw(session))
+
+def find_tallest_document(heroes: list, gender: str, has_job: bool):
+    """Поиск самого высокого героя среди декодированных полей поиска.
+
+    Параметры:
+        heroes (list): пары (SearchFields, документ героя),
+        см. json_decoder.decode_hero_list.
+        gender (str): пол супергероя.
+        has_job (bool): наличие работы у супергероя.
+
+    Возвращает:
+        документ самого высокого героя или None, если героев не найдено.
+    """
+
+    tallest_document = None
+    max_height = None
+    for fields, document in heroes:
+        if fields.gender != gender or (fields.base not in ["-", ""]) != has_job:
+            continue
+        try:
+            height_in_cm = convert_height_to_cm(fields.height)
+        except ValueError:
+            continue
+        if max_height is None or height_in_cm > max_height:
+            max_height = height_in_cm
+            tallest_document = document
+    return tallest_document
+
+def find_tallest_hero(content: bytes, gender: str, has_job: bool) -> dict:
+    """Поиск самого высокого героя в содержимом all.json.
+
+    Из all.json декодируются только пол, рост и место работы, полностью
+    декодируется лишь найденный герой (см. json_decoder).
+
+    Параметры:
+        content (bytes): содержимое all.json.
+        gender (str): пол супергероя.
+        has_job (bool): наличие работы у супергероя.
+
+    Возвращает:
+        dict: Словарь с информацией о самом высоком супергерое или
+        пустой словарь, если героев не найдено.
+    """
+
+    with profiling.span("decode"):
+        heroes = decode_hero_list(content)
+    with profiling.span("filter"):
+        tallest_document = find_tallest_document(heroes, gender, has_job)
+    with profiling.span("decode"):
+        return materialize(tallest_document) if tallest_document is not None else {}
+
+def get_tallest_hero(gender: str, has_job: bool, session=None) -> dict:
     """Поиск самого высокого супергероя по полу и наличию работы.
 
     Если герой не имеет места работы (base) или оно указано как '-',
@@ -39,37 +151,76 @@ def get_tallest_hero(gender: str, has_job: bool) -> dict:
     Параметры:
         gender (str): пол супергероя ("Male" или "Female").
         has_job (bool): наличие работы у супергероя (True) или нет (False).
+        session: сессия для загрузки all.json (необязательно).
 
     Возвращает:
         dict: Словарь с информацией о самом высоком супергерое или
         пустой словарь, если героев не найдено.
     """
 
-    response = requests.get("https://akabab.github.io/superhero-api/api/all.json")
-    all_heroes = response.json()
+    with profiling.span("fetch"):
+        content = fetch_all_heroes_raw(session)
+    return find_tallest_hero(content, gender, has_job)
 
-    filtered_heroes = [
-        hero for hero in all_heroes
-        if hero["appearance"]["gender"] == gender and
-        (
-            (has_job and hero.get("work", {}).get("base", "") not in ["-", ""]) or
-            (not has_job and hero.get("work", {}).get("base", "") in ["", "-"])
-        )
-    ]
+def get_tallest_hero_cached(gender: str, has_job: bool, session=None, cache: ResultCache = None) -> dict:
+    """Поиск самого высокого супергероя с кэшированием результата.
 
-    tallest_hero = None
-    for hero in filtered_heroes:
-        try:
-            height_in_cm = convert_height_to_cm(hero["appearance"]["height"][1])
-            if tallest_hero is None or height_in_cm > convert_height_to_cm(tallest_hero["appearance"]["height"][1]):
-                tallest_hero = hero
-        except ValueError:
-            continue
+    Результат сохраняется в файловом кэше по версии all.json (ETag или
+    хэш содержимого). Пока версия не требует перепроверки, ответ
+    возвращается из кэша без запросов к сети. При перепроверке
+    отправляется HEAD-запрос, и all.json загружается заново (через
+    fetch_all_heroes_raw, то есть и через общий кэш) только если его
+    ETag изменился или отсутствует.
 
-    return tallest_hero if tallest_hero else {}
+    Параметры:
+        gender (str): пол супергероя ("Male" или "Female").
+        has_job (bool): наличие работы у супергероя (True) или нет (False).
+        session: сессия для загрузки all.json (необязательно).
+        cache (ResultCache): кэш результатов, по умолчанию result_cache.
+
+    Возвращает:
+        dict: Словарь с информацией о самом высоком супергерое или
+        пустой словарь, если героев не найдено.
+
+    Исключения:
+        RuntimeError: если HEAD- или GET-запрос all.json завершился
+        статусом, отличным от 200. Версия в этом случае не сохраняется.
+    """
+
+    cache = cache if cache is not None else result_cache
+    client = session if session is not None else requests
+
+    version = cache.fresh_version(ALL_HEROES_URL)
+    if version is None:
+        response = client.head(ALL_HEROES_URL, headers=DEFAULT_HEADERS)
+        if response.status_code != 200:
+            raise RuntimeError(f"Ошибка при проверке all.json: {response.status_code}")
+        version = response.headers.get("ETag")
+        if version is not None:
+            cache.save_version(ALL_HEROES_URL, version)
+    if version is not None:
+        cached_hero = cache.get(ALL_HEROES_URL, version, gender, has_job)
+        if cached_hero is not None:
+            return cached_hero
+
+    with profiling.span("fetch"):
+        content = fetch_all_heroes_raw(session)
+    if version is None:
+        # Источник без ETag: версией служит хэш загруженного содержимого.
+        version = content_version(content)
+        cache.save_version(ALL_HEROES_URL, version)
+    hero = find_tallest_hero(content, gender, has_job)
+    cache.put(ALL_HEROES_URL, version, gender, has_job, hero)
+    return hero
 
 def main():
-    result = get_tallest_hero("Male", True)
+    args = profiling.parse_args("Поиск самого высокого супергероя по файлу all.json")
+
+    def query():
+        with create_sync_session() as session:
+            return get_tallest_hero("Male", True, session)
+
+    result = profiling.run(query, args)
     pprint.pprint(result)
 
 if __name__ == "__main__":
@@ -0,0 +1,193 @@
+import argparse
+import gc
+import heapq
+import pprint
+from collections import defaultdict
+
+from json_decoder import extract_search_fields, loads
+from tallest_hero_all import convert_height_to_cm
+
+OPERATIONS = ("insert", "update", "delete")
+# Сколько устаревших записей допускается в куче сверх актуальных до её перестроения.
+COMPACT_SLACK = 64
+
+
+class TallestHeroIndex:
+    """Инкрементальный поиск самых высоких героев по ленте изменений.
+
+    Для каждой пары (пол, наличие работы) поддерживается куча по росту,
+    поэтому добавление, изменение и удаление героя стоят O(log n), а не
+    полного пересчёта get_tallest_hero. Изменённые и удалённые герои
+    удаляются из кучи лениво: устаревшие записи пропускаются при чтении,
+    а когда их становится больше актуальных, куча перестраивается.
+
+    Рост и место работы разбираются так же, как в tallest_hero_all:
+    герои с некорректным ростом не учитываются, работа есть, если base
+    не '-' и не пустая строка. При равном росте выбирается герой с меньшим ID.
+    """
+
+    def __init__(self):
+        self._heroes = {}
+        self._heaps = defaultdict(list)
+        self._live = defaultdict(int)
+        self._stale = defaultdict(int)
+        self._version = 0
+
+    @classmethod
+    def from_heroes(cls, heroes):
+        """Построение индекса по списку героев (например, из all.json)."""
+
+        index = cls()
+        for hero in heroes:
+            index.upsert(hero)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._heroes)
+
+    def __contains__(self, hero_id) -> bool:
+        return int(hero_id) in self._heroes
+
+    @staticmethod
+    def _search_key(hero: dict):
+        """Группа (пол, наличие работы) и рост героя или None, если рост некорректен."""
+
+        fields = extract_search_fields(hero)
+        try:
+            height = convert_height_to_cm(fields.height)
+        except ValueError:
+            return None
+        return (fields.gender, fields.base not in ["-", ""]), height
+
+    def _invalidate(self, hero_id: int):
+        entry = self._heroes.pop(hero_id, None)
+        if entry is None or entry[0] is None:
+            return
+        group = entry[0]
+        self._live[group] -= 1
+        self._stale[group] += 1
+        if self._stale[group] > self._live[group] + COMPACT_SLACK:
+            self._compact(group)
+
+    def _compact(self, group):
+        heap = [item for item in self._heaps[group] if self._is_current(item)]
+        heapq.heapify(heap)
+        self._heaps[group] = heap
+        self._stale[group] = 0
+
+    def _is_current(self, item) -> bool:
+        entry = self._heroes.get(item[1])
+        return entry is not None and entry[2] == item[2]
+
+    def upsert(self, hero: dict):
+        """Добавление или изменение героя (по полю id)."""
+
+        hero_id = int(hero["id"])
+        self._invalidate(hero_id)
+        self._version += 1
+        key = self._search_key(hero)
+        if key is None:
+            self._heroes[hero_id] = (None, None, self._version, hero)
+            return
+        group, height = key
+        self._heroes[hero_id] = (group, height, self._version, hero)
+        self._live[group] += 1
+        heapq.heappush(self._heaps[group], (-height, hero_id, self._version))
+
+    def delete(self, hero_id):
+        """Удаление героя. Удаление отсутствующего героя ничего не делает."""
+
+        self._invalidate(int(hero_id))
+
+    def apply(self, event: dict):
+        """Применение события ленты изменений.
+
+        Параметры:
+            event (dict): {"op": "insert" или "update", "hero": {...}}
+            либо {"op": "delete", "id": ID}.
+
+        Исключения:
+            ValueError: если тип события неизвестен.
+        """
+
+        operation = event.get("op")
+        if operation == "delete":
+            self.delete(event["id"])
+        elif operation in OPERATIONS:
+            self.upsert(event["hero"])
+        else:
+            raise ValueError(f"Неизвестный тип события: {operation}")
+
+    def replay(self, path: str) -> int:
+        """Применение ленты изменений из файла JSON Lines.
+
+        Возвращает:
+            int: количество применённых событий.
+        """
+
+        count = 0
+        # При загрузке создаётся много долгоживущих словарей, и сборщик мусора
+        # многократно обходил бы их без пользы, поэтому на время чтения он отключается.
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(path, "rb") as file:
+                for line in file:
+                    if line.strip():
+                        self.apply(loads(line))
+                        count += 1
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        return count
+
+    def top(self, gender: str, has_job: bool, k: int) -> list:
+        """k самых высоких героев по убыванию роста за O(k log n).
+
+        Параметры:
+            gender (str): пол супергероя.
+            has_job (bool): наличие работы у супергероя.
+            k (int): количество героев.
+
+        Возвращает:
+            list: словари с информацией о героях.
+        """
+
+        heap = self._heaps.get((gender, has_job), [])
+        found = []
+        while heap and len(found) < k:
+            item = heapq.heappop(heap)
+            if self._is_current(item):
+                found.append(item)
+            else:
+                self._stale[(gender, has_job)] -= 1
+        for item in found:
+            heapq.heappush(heap, item)
+        return [self._heroes[item[1]][3] for item in found]
+
+    def tallest(self, gender: str, has_job: bool) -> dict:
+        """Самый высокий герой, как в get_tallest_hero.
+
+        Возвращает:
+            dict: информация о герое или пустой словарь, если героев не найдено.
+        """
+
+        heroes = self.top(gender, has_job, 1)
+        return heroes[0] if heroes else {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Самые высокие герои по ленте изменений в формате JSON Lines")
+    parser.add_argument("changes", help="путь к ленте изменений")
+    parser.add_argument("--gender", default="Male", help="пол супергероя")
+    parser.add_argument("--no-job", action="store_true", help="искать героев без работы")
+    parser.add_argument("--top", type=int, default=1, help="количество героев")
+    args = parser.parse_args()
+
+    index = TallestHeroIndex()
+    index.replay(args.changes)
+    pprint.pprint(index.top(args.gender, not args.no_job, args.top))
+
+
+if __name__ == "__main__":
+    main()
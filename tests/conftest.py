@@ -0,0 +1,67 @@
+import contextlib
+import os
+
+# Тесты не должны подключаться к общему кэшу, настроенному в окружении разработчика,
+# поэтому переменная удаляется до импорта модулей, читающих её при загрузке.
+os.environ.pop("HERO_SHARED_CACHE", None)
+
+import pytest
+
+import asynch_tallest_hero
+import synch_tallest_hero_api
+import tallest_hero_all
+from adaptive_limiter import AdaptiveLimiter
+from result_cache import ResultCache
+from stub_server import StubServer
+
+
+def pytest_collection_modifyitems(items):
+    # Тесты без метки slow не поднимают серверов и процессов: `pytest -m fast`.
+    for item in items:
+        if item.get_closest_marker("slow") is None:
+            item.add_marker(pytest.mark.fast)
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(monkeypatch, tmp_path):
+    """Изоляция модульного состояния между тестами.
+
+    Кэши героев очищаются до и после теста (тесты импортируют их
+    напрямую, поэтому объекты не заменяются), кэши результатов пишут во
+    временный каталог теста, а ограничитель запросов создаётся заново.
+    Так тесты не зависят от порядка и могут выполняться в pytest-xdist.
+    """
+
+    for module in (asynch_tallest_hero, synch_tallest_hero_api, tallest_hero_all):
+        monkeypatch.setattr(module, "result_cache", ResultCache(str(tmp_path / "result_cache")))
+    monkeypatch.setattr(asynch_tallest_hero, "concurrency_limiter", AdaptiveLimiter())
+    monkeypatch.setattr(tallest_hero_all, "shared_cache", None)
+    asynch_tallest_hero.hero_cache.clear()
+    synch_tallest_hero_api.hero_cache.clear()
+    yield
+    asynch_tallest_hero.hero_cache.clear()
+    synch_tallest_hero_api.hero_cache.clear()
+
+
+@pytest.fixture
+def stub_api(monkeypatch):
+    """Запуск заглушки API и перенаправление на неё модулей.
+
+    Фикстура возвращает функцию start(heroes): она запускает StubServer
+    со списком героев, направляет на него all.json и API обоих модулей,
+    задаёт MAX_ID по количеству героев и возвращает сервер. Тесты
+    дополняют её своими фикстурами (ограничитель, общий кэш). Сервер
+    останавливается после теста.
+    """
+
+    with contextlib.ExitStack() as stack:
+        def start(heroes) -> StubServer:
+            heroes = list(heroes)
+            server = stack.enter_context(StubServer(heroes))
+            monkeypatch.setattr(tallest_hero_all, "ALL_HEROES_URL", f"{server.url}/all.json")
+            for module in (asynch_tallest_hero, synch_tallest_hero_api):
+                monkeypatch.setattr(module, "API_URL", f"{server.url}/api")
+                monkeypatch.setattr(module, "MAX_ID", len(heroes))
+            return server
+
+        yield start
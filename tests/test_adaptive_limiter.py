@@ -0,0 +1,157 @@
+import asyncio
+
+import pytest
+
+import asynch_tallest_hero
+from adaptive_limiter import AdaptiveLimiter, Slot, is_overload_status
+from generate_heroes import generate_heroes
+from http_backend import create_async_session
+
+heroes = list(generate_heroes(60, seed=7))
+
+def make_slot(started=None):
+    slot = Slot()
+    if started is not None:
+        slot.started = started
+    return slot
+
+def test_is_overload_status():
+    """Тестирование признака перегрузки по коду ответа."""
+    assert is_overload_status(429)
+    assert is_overload_status(503)
+    assert not is_overload_status(200)
+    assert not is_overload_status(404)
+
+def test_limit_grows_on_flat_latency():
+    """Тестирование роста лимита при неизменной задержке."""
+    limiter = AdaptiveLimiter(initial_limit=4, max_limit=10)
+    for _ in range(20):
+        limiter.record(make_slot(), 0.01)
+    assert limiter.stats()["limit"] == 10
+    assert limiter.decreases == 0
+
+def test_limit_decreases_on_latency_growth():
+    """Тестирование уменьшения лимита при росте задержки."""
+    limiter = AdaptiveLimiter(initial_limit=16)
+    limiter.record(make_slot(), 0.01)
+    limiter.record(make_slot(), 0.1)
+    assert limiter.stats()["limit"] == 8
+    assert limiter.decreases == 1
+
+def test_limit_decreases_on_overload_status():
+    """Тестирование уменьшения лимита при ответе 429."""
+    limiter = AdaptiveLimiter(initial_limit=16, min_limit=2)
+    for _ in range(5):
+        slot = make_slot()
+        slot.report_status(429)
+        limiter.record(slot, 0.01)
+        limiter._last_decrease = 0.0
+    assert limiter.stats()["limit"] == 2
+    assert limiter.overloads == 5
+
+def test_single_decrease_per_wave():
+    """Тестирование одного уменьшения лимита на волну запросов."""
+    limiter = AdaptiveLimiter(initial_limit=16)
+    wave = [make_slot() for _ in range(10)]
+    for slot in wave:
+        slot.report_status(503)
+        limiter.record(slot, 0.01)
+    assert limiter.stats()["limit"] == 8
+    assert limiter.decreases == 1
+
+@pytest.mark.asyncio
+async def test_in_flight_never_exceeds_limit():
+    """Тестирование ограничения количества одновременных запросов."""
+    limiter = AdaptiveLimiter(initial_limit=3, max_limit=3)
+    in_flight = max_in_flight = 0
+
+    async def request():
+        nonlocal in_flight, max_in_flight
+        async with limiter.slot():
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+
+    await asyncio.gather(*[request() for _ in range(20)])
+    assert max_in_flight == 3
+    assert limiter.stats()["in_flight"] == 0
+    assert limiter.successes == 20
+
+@pytest.mark.asyncio
+async def test_cancelled_requests_are_not_recorded():
+    """Тестирование отмены запроса: слот освобождается, задержка не учитывается."""
+    limiter = AdaptiveLimiter()
+
+    async def request():
+        async with limiter.slot():
+            await asyncio.sleep(10)
+
+    task = asyncio.create_task(request())
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert limiter.stats()["in_flight"] == 0
+    assert limiter.successes == 0
+    assert limiter.overloads == 0
+
+@pytest.mark.asyncio
+async def test_waiters_served_in_order():
+    """Тестирование очереди: слоты передаются ожидающим по порядку, отменённые пропускаются."""
+    limiter = AdaptiveLimiter(initial_limit=1, max_limit=1)
+    order = []
+
+    async def request(name):
+        async with limiter.slot():
+            order.append(name)
+            await asyncio.sleep(0.001)
+
+    first = asyncio.create_task(request("first"))
+    await asyncio.sleep(0)
+    waiters = {name: asyncio.create_task(request(name)) for name in ["a", "b", "c"]}
+    await asyncio.sleep(0)
+    waiters["b"].cancel()
+    await asyncio.gather(first, *waiters.values(), return_exceptions=True)
+    assert order == ["first", "a", "c"]
+    assert limiter.stats()["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_timeout_counts_as_overload():
+    """Тестирование тайм-аута внутри слота как признака перегрузки."""
+    limiter = AdaptiveLimiter(initial_limit=8)
+    with pytest.raises(asyncio.TimeoutError):
+        async with limiter.slot():
+            raise asyncio.TimeoutError
+    assert limiter.overloads == 1
+    assert limiter.stats()["limit"] == 4
+
+@pytest.fixture
+def limited_stub(stub_api, monkeypatch):
+    monkeypatch.setattr(asynch_tallest_hero, "concurrency_limiter", AdaptiveLimiter(initial_limit=16))
+    return stub_api(heroes)
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_query_completes_under_server_capacity(limited_stub):
+    """Тестирование запроса к API с ограниченной пропускной способностью: ответы 429 повторяются."""
+    limited_stub.latency = 0.005
+    limited_stub.capacity = 4
+    hero = await asynch_tallest_hero.tallest_hero("Male", True)
+    assert hero
+    metrics = asynch_tallest_hero.get_metrics()["concurrency"]
+    assert limited_stub.rejected_count > 0
+    assert metrics["overloads"] > 0
+    assert metrics["limit"] < 16
+    assert metrics["in_flight"] == 0
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_persistent_overload_raises(limited_stub, monkeypatch):
+    """Тестирование ошибки, если сервер отвечает 429 на все попытки."""
+    monkeypatch.setattr(asynch_tallest_hero, "RETRY_DELAY", 0)
+    limited_stub.capacity = 0
+    async with create_async_session() as session:
+        with pytest.raises(RuntimeError, match="429"):
+            await asynch_tallest_hero.get_hero_info(session, 1)
+    assert limited_stub.rejected_count == asynch_tallest_hero.MAX_RETRIES + 1
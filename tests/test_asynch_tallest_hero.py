@@ -1,3 +1,5 @@
+import asyncio
+import json
 import os
 
 import pytest
@@ -6,11 +8,24 @@ from aioresponses import aioresponses
 from dotenv import load_dotenv
 from unittest.mock import patch
 
-from asynch_tallest_hero import get_hero_info, convert_height_to_cm, tallest_hero, hero_cache
+from asynch_tallest_hero import get_hero_info, convert_height_to_cm, tallest_hero, tallest_hero_within, hero_cache
+from asynch_tallest_hero import fetch_hero_batches, tallest_hero_batched, tallest_hero_preview
+from bounded_cache import BoundedCache
+from generate_heroes import generate_heroes
+from json_decoder import cache_entries, materialize
 
 load_dotenv()
 ACCESS_TOKEN = os.getenv("ACCESS_TOKEN")
 
+
+def as_entry(hero: dict):
+    """Запись кэша героев (CachedHero) для словаря героя."""
+    return cache_entries([json.dumps(hero).encode()])[0]
+
+def entries_from(heroes: dict):
+    """Замена _get_hero_entry, возвращающая записи кэша для словарей героев."""
+    return lambda session, hero_id, cache=None, deadline=None: as_entry(heroes[hero_id])
+
 @pytest.mark.parametrize("input_height, expected_output", [
     ("179 cm", 179),
     ("0 cm", 0),
@@ -97,12 +112,12 @@ async def test_get_hero_info_cache():
         async with aiohttp.ClientSession() as session:
             result = await get_hero_info(session, character_id)
     assert result == expected_response
-    assert hero_cache[character_id] == expected_response
+    assert materialize(hero_cache[character_id]) == expected_response
 
     async with aiohttp.ClientSession() as session:
         cached_result = await get_hero_info(session, character_id)
     assert cached_result == expected_response
-    assert hero_cache[character_id] == expected_response
+    assert materialize(hero_cache[character_id]) == expected_response
 
 
 @pytest.mark.asyncio
@@ -207,69 +222,221 @@ def mock_hero_cache():
     return mock_hero_cache
 
 @pytest.mark.asyncio
-@patch('asynch_tallest_hero.get_hero_info')
+@patch('asynch_tallest_hero._get_hero_entry')
 @patch('asynch_tallest_hero.MAX_ID', new=6)
-async def test_get_tallest_hero_male_with_job(mock_get_hero_info, mock_hero_cache):
+async def test_get_tallest_hero_male_with_job(mock_get_hero_entry, mock_hero_cache):
     """
     Тестирование функции tallest_hero для героев
     мужского пола с заполненным местом работы.
     """
-    mock_get_hero_info.side_effect = lambda session, hero_id: mock_hero_cache[hero_id]
+    mock_get_hero_entry.side_effect = entries_from(mock_hero_cache)
     result = await tallest_hero("Male", True)
     assert result["appearance"]["height"][1] == "191 cm"
     assert result["appearance"]["gender"] == "Male"
     assert result["work"]["base"] == "Metropolis"
 
 @pytest.mark.asyncio
-@patch('asynch_tallest_hero.get_hero_info')
+@patch('asynch_tallest_hero._get_hero_entry')
 @patch('asynch_tallest_hero.MAX_ID', new=6)
-async def test_get_tallest_hero_male_without_job(mock_get_hero_info, mock_hero_cache):
+async def test_get_tallest_hero_male_without_job(mock_get_hero_entry, mock_hero_cache):
     """
     Тестирование функции tallest_hero для героев
     мужского пола без работы.
     """
-    mock_get_hero_info.side_effect = lambda session, hero_id: mock_hero_cache[hero_id]
+    mock_get_hero_entry.side_effect = entries_from(mock_hero_cache)
     result = await tallest_hero("Male", False)
     assert result["appearance"]["height"][1] == "173 cm"
     assert result["appearance"]["gender"] == "Male"
     assert result["work"]["base"] == "-"
 
 @pytest.mark.asyncio
-@patch('asynch_tallest_hero.get_hero_info')
+@patch('asynch_tallest_hero._get_hero_entry')
 @patch('asynch_tallest_hero.MAX_ID', new=6)
-async def test_get_tallest_hero_female_with_job(mock_get_hero_info, mock_hero_cache):
+async def test_get_tallest_hero_female_with_job(mock_get_hero_entry, mock_hero_cache):
     """
     Тестирование функции tallest_hero для героев
     женского пола с заполненным местом работы.
     """
-    mock_get_hero_info.side_effect = lambda session, hero_id: mock_hero_cache[hero_id]
+    mock_get_hero_entry.side_effect = entries_from(mock_hero_cache)
     result = await tallest_hero("Female", True)
     assert result["appearance"]["height"][1] == "175 cm"
     assert result["appearance"]["gender"] == "Female"
     assert result["work"]["base"] == "Earth"
 
 @pytest.mark.asyncio
-@patch('asynch_tallest_hero.get_hero_info')
+@patch('asynch_tallest_hero._get_hero_entry')
 @patch('asynch_tallest_hero.MAX_ID', new=6)
-async def test_get_tallest_hero_female_without_job(mock_get_hero_info, mock_hero_cache):
+async def test_get_tallest_hero_female_without_job(mock_get_hero_entry, mock_hero_cache):
     """
     Тестирование функции tallest_hero для героев
     женского пола без работы.
     """
-    mock_get_hero_info.side_effect = lambda session, hero_id: mock_hero_cache[hero_id]
+    mock_get_hero_entry.side_effect = entries_from(mock_hero_cache)
     result = await tallest_hero("Female", False)
     assert result["appearance"]["height"][1] == "179 cm"
     assert result["appearance"]["gender"] == "Female"
     assert result["work"]["base"] == "-"
 
 @pytest.mark.asyncio
-@patch('asynch_tallest_hero.get_hero_info')
+@patch('asynch_tallest_hero._get_hero_entry')
 async def test_no_heroes_found(mock_hero_cache):
     """
     Тестирование функции tallest_hero
     при отсутствии героев.
     """
     mock_hero_cache.clear()
-    mock_hero_cache.return_value = None
+    mock_hero_cache.return_value = as_entry({})
     result = await tallest_hero("Male", True)
-    assert result == {}
\ No newline at end of file
+    assert result == {}
+
+@pytest.mark.asyncio
+@patch('asynch_tallest_hero.MAX_ID', new=6)
+async def test_tallest_hero_within_deadline(mock_hero_cache):
+    """
+    Тестирование функции tallest_hero_within при истечении
+    времени: возвращается лучший из полученных героев.
+    """
+    cancelled = []
+
+    async def slow_get_hero_entry(session, hero_id, cache=None, deadline=None):
+        if hero_id == 2:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(hero_id)
+                raise
+        return as_entry(mock_hero_cache[hero_id])
+
+    with patch('asynch_tallest_hero._get_hero_entry', side_effect=slow_get_hero_entry):
+        result = await tallest_hero_within("Male", True, timeout=0.1)
+    assert result.is_complete is False
+    assert result.hero["appearance"]["height"][1] == "178 cm"
+    assert cancelled == [2]
+
+@pytest.mark.asyncio
+@patch('asynch_tallest_hero._get_hero_entry')
+@patch('asynch_tallest_hero.MAX_ID', new=6)
+async def test_tallest_hero_within_complete(mock_get_hero_entry, mock_hero_cache):
+    """
+    Тестирование функции tallest_hero_within,
+    успевающей проверить всех героев.
+    """
+    mock_get_hero_entry.side_effect = entries_from(mock_hero_cache)
+    result = await tallest_hero_within("Female", False, timeout=5)
+    assert result.is_complete is True
+    assert result.hero["appearance"]["height"][1] == "179 cm"
+
+@pytest.mark.asyncio
+@patch('asynch_tallest_hero.MAX_ID', new=6)
+async def test_tallest_hero_preview_refines(mock_hero_cache):
+    """
+    Тестирование предварительного ответа tallest_hero_preview:
+    по истечении budget возвращается лучший из проверенных героев,
+    а точный ответ вычисляется в фоне.
+    """
+    async def slow_get_hero_entry(session, hero_id, cache=None, deadline=None):
+        if hero_id == 2:
+            await asyncio.sleep(0.3)
+        return as_entry(mock_hero_cache[hero_id])
+
+    with patch('asynch_tallest_hero._get_hero_entry', side_effect=slow_get_hero_entry):
+        preview = await tallest_hero_preview("Male", True, budget=0.1, seed=1)
+        assert preview.hero["appearance"]["height"][1] == "178 cm"
+        assert (preview.checked, preview.total) == (5, 6)
+        assert preview.confidence == pytest.approx(5 / 6)
+        exact = await preview.exact
+    assert exact["appearance"]["height"][1] == "191 cm"
+
+@pytest.mark.asyncio
+@patch('asynch_tallest_hero._get_hero_entry')
+@patch('asynch_tallest_hero.MAX_ID', new=6)
+async def test_tallest_hero_preview_sample_size(mock_get_hero_entry, mock_hero_cache):
+    """
+    Тестирование tallest_hero_preview: предварительный ответ
+    возвращается после проверки sample_size героев.
+    """
+    mock_get_hero_entry.side_effect = entries_from(mock_hero_cache)
+    preview = await tallest_hero_preview("Female", False, budget=None, sample_size=3, seed=2)
+    assert 3 <= preview.checked <= 6
+    assert await preview.exact == await tallest_hero("Female", False)
+
+@pytest.mark.asyncio
+@patch('asynch_tallest_hero._get_hero_entry')
+@patch('asynch_tallest_hero.MAX_ID', new=6)
+async def test_tallest_hero_preview_error(mock_get_hero_entry):
+    """Тестирование ошибки запроса до предварительного ответа."""
+    mock_get_hero_entry.side_effect = RuntimeError("Ошибка при получении информации о герое с ID 1: 404")
+    with pytest.raises(RuntimeError, match="404"):
+        await tallest_hero_preview("Male", True, budget=1)
+
+@pytest.fixture
+def batch_stub(stub_api):
+    return stub_api(generate_heroes(40, seed=4))
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+@pytest.mark.parametrize("gender, has_job", [("Male", True), ("Female", False)])
+async def test_tallest_hero_batched_matches(batch_stub, gender, has_job):
+    """Тестирование совпадения пакетной загрузки с загрузкой по одному герою."""
+    batched = await tallest_hero_batched(gender, has_job, chunk_size=7, connections=3)
+    hero_cache.clear()
+    assert batched == await tallest_hero(gender, has_job)
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_fetch_hero_batches_uses_cache(batch_stub):
+    """Тестирование пакетной загрузки только отсутствующих в кэше героев."""
+    hero_cache[2] = cache_entries([b'{"id": "2", "name": "Cached"}'])[0]
+    async with aiohttp.ClientSession() as session:
+        batches = [batch async for batch in fetch_hero_batches(session, [1, 2, 3, 4, 5], chunk_size=2)]
+    heroes = dict(pair for batch in batches for pair in batch)
+    assert sorted(heroes) == [1, 2, 3, 4, 5]
+    assert materialize(heroes[2])["name"] == "Cached"
+    assert batch_stub.requests_count == 4
+    assert 5 in hero_cache
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_fetch_hero_batches_error(batch_stub):
+    """Тестирование ошибки пакетной загрузки для несуществующего героя."""
+    async with aiohttp.ClientSession() as session:
+        with pytest.raises(RuntimeError, match="404"):
+            async for _ in fetch_hero_batches(session, [1, 2, 99], chunk_size=1):
+                pass
+
+@pytest.mark.asyncio
+async def test_get_hero_info_injected_cache():
+    """Тестирование переданного кэша: модульный hero_cache не используется."""
+    expected_response = {"id": 1, "name": "Batman", "appearance": {"gender": "Male", "height": ["6'2", "188 cm"]}}
+    cache = BoundedCache()
+    with aioresponses() as m:
+        m.get(f"https://superheroapi.com/api/{ACCESS_TOKEN}/1", payload=expected_response)
+        async with aiohttp.ClientSession() as session:
+            assert await get_hero_info(session, 1, cache=cache) == expected_response
+            assert await get_hero_info(session, 1, cache=cache) == expected_response
+    assert materialize(cache[1]) == expected_response
+    assert 1 not in hero_cache
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_tallest_hero_batched_injected_cache(batch_stub):
+    """Тестирование пакетного поиска с отдельным кэшем героев."""
+    cache = BoundedCache()
+    hero = await tallest_hero_batched("Male", True, chunk_size=7, cache=cache)
+    assert hero
+    assert len(cache) == 40
+    assert len(hero_cache) == 0
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_tallest_hero_injected_session_and_cache(batch_stub):
+    """Тестирование поиска с переданными сессией и кэшем героев."""
+    cache = BoundedCache()
+    async with aiohttp.ClientSession() as session:
+        hero = await tallest_hero("Male", True, session=session, cache=cache)
+        assert not session.closed
+        preview = await tallest_hero_preview("Male", True, budget=None, session=session, cache=cache)
+        assert await preview.exact == hero
+    assert len(cache) == 40
+    assert len(hero_cache) == 0
+    assert batch_stub.requests_count == 40
@@ -0,0 +1,84 @@
+import pytest
+
+from bounded_cache import BoundedCache, approximate_size
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_lru_eviction_by_entries():
+    """Тестирование вытеснения давно неиспользуемой записи."""
+    cache = BoundedCache(max_entries=2)
+    cache[1] = {"name": "Batman"}
+    cache[2] = {"name": "Robin"}
+    assert cache[1] == {"name": "Batman"}
+    cache[3] = {"name": "Superman"}
+    assert 2 not in cache
+    assert 1 in cache and 3 in cache
+    assert cache.stats()["evictions"] == 1
+
+def test_eviction_by_bytes():
+    """Тестирование ограничения кэша по объёму памяти."""
+    value = {"name": "Batman", "work": {"base": "Gotham City"}}
+    cache = BoundedCache(max_bytes=approximate_size(value) * 2)
+    for key in range(5):
+        cache[key] = dict(value)
+    assert len(cache) == 2
+    assert cache.current_bytes <= cache.max_bytes
+    assert list(cache._entries) == [3, 4]
+
+def test_ttl_expiration():
+    """Тестирование истечения времени жизни записи."""
+    clock = FakeClock()
+    cache = BoundedCache(ttl=10, clock=clock)
+    cache[1] = {"name": "Batman"}
+    clock.now = 5
+    assert cache.get(1) == {"name": "Batman"}
+    clock.now = 10
+    assert 1 not in cache
+    assert cache.get(1) is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.current_bytes == 0
+
+def test_stats_and_clear():
+    """Тестирование статистики попаданий и промахов и очистки кэша."""
+    cache = BoundedCache()
+    cache[1] = {"name": "Batman"}
+    cache.get(1)
+    cache.get(2)
+    with pytest.raises(KeyError):
+        cache[3]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+    assert stats["bytes"] > 0
+    cache.clear()
+    assert len(cache) == 0 and cache.current_bytes == 0
+
+def test_from_env(monkeypatch):
+    """Тестирование настройки кэша через переменные окружения."""
+    monkeypatch.setenv("HERO_CACHE_MAX_BYTES", "1000")
+    monkeypatch.setenv("HERO_CACHE_TTL", "60")
+    monkeypatch.delenv("HERO_CACHE_MAX_ENTRIES", raising=False)
+    cache = BoundedCache.from_env(default_max_entries=731)
+    assert (cache.max_entries, cache.max_bytes, cache.ttl) == (731, 1000, 60.0)
+
+def test_set_with_own_ttl():
+    """Тестирование времени жизни, заданного для отдельной записи."""
+    clock = FakeClock()
+    cache = BoundedCache(clock=clock)
+    cache.set("all.json", b"[]", ttl=60)
+    cache[1] = {"name": "Batman"}
+    clock.now = 60
+    assert "all.json" not in cache
+    assert cache.get(1) == {"name": "Batman"}
+
+def test_get_many_and_set_many():
+    """Тестирование пакетного чтения и записи."""
+    cache = BoundedCache(max_entries=3)
+    cache.set_many({1: {"name": "Batman"}, 2: {"name": "Robin"}, 3: {"name": "Joker"}, 4: {"name": "Bane"}})
+    assert cache.get_many([1, 2, 4]) == {2: {"name": "Robin"}, 4: {"name": "Bane"}}
+    assert (cache.stats()["hits"], cache.stats()["misses"], cache.stats()["evictions"]) == (2, 1, 1)
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+import asynch_tallest_hero
+import fastest_source
+import tallest_hero_all
+from fastest_source import save_snapshot, tallest_hero_fastest
+from generate_heroes import generate_heroes
+
+# Все тесты модуля запускают заглушку API.
+pytestmark = pytest.mark.slow
+
+heroes = list(generate_heroes(20, seed=5))
+
+@pytest.fixture
+def stub(stub_api):
+    return stub_api(heroes)
+
+@pytest.fixture
+def snapshot(stub, tmp_path):
+    path = str(tmp_path / "all.json")
+    save_snapshot(path)
+    return path
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("gender, has_job", [("Male", True), ("Female", False)])
+async def test_all_sources_agree(stub, snapshot, gender, has_job):
+    """Тестирование одинакового ответа для каждого источника."""
+    expected = tallest_hero_all.get_tallest_hero(gender, has_job)
+    for source in ["all.json", "api", "snapshot"]:
+        result = await tallest_hero_fastest(gender, has_job, sources=(source,), snapshot_path=snapshot)
+        assert result.source == source
+        assert str(result.hero["id"]) == str(expected["id"])
+
+@pytest.mark.asyncio
+async def test_losers_cancelled(stub, snapshot, monkeypatch):
+    """Тестирование отмены медленных источников после победы быстрого."""
+    started = []
+    cancelled = []
+
+    async def slow_fetch_hero_content(session, character_id):
+        started.append(character_id)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(character_id)
+            raise
+
+    monkeypatch.setattr(asynch_tallest_hero, "_fetch_hero_content", slow_fetch_hero_content)
+    result = await tallest_hero_fastest("Male", True, sources=("api", "snapshot"), snapshot_path=snapshot)
+    assert result.source == "snapshot"
+    assert result.reports["snapshot"].status == "won"
+    assert result.reports["api"].status == "cancelled"
+    assert result.reports["api"].elapsed < 5
+    assert started and cancelled == started
+
+@pytest.mark.asyncio
+async def test_failed_source_skipped(stub, tmp_path, monkeypatch):
+    """Тестирование пропуска источников с ошибкой или пустыми данными."""
+    empty_snapshot = tmp_path / "empty.json"
+    empty_snapshot.write_text(json.dumps([]))
+    monkeypatch.setattr(tallest_hero_all, "ALL_HEROES_URL", f"{stub.url}/missing.json")
+    result = await tallest_hero_fastest("Male", True, snapshot_path=str(empty_snapshot))
+    assert result.source == "api"
+    assert result.reports["all.json"].status == "failed"
+    assert result.reports["snapshot"].status == "failed"
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("snapshot_heroes", [heroes[:10], heroes[:-1] + [{"id": "20", "name": "Broken"}]])
+async def test_incomplete_snapshot_rejected(stub, tmp_path, snapshot_heroes):
+    """Тестирование отказа от усечённого снимка и снимка с героем без полей поиска."""
+    path = tmp_path / "partial.json"
+    path.write_text(json.dumps(snapshot_heroes))
+    result = await tallest_hero_fastest("Male", True, sources=("api", "snapshot"), snapshot_path=str(path))
+    assert result.source == "api"
+    assert result.reports["snapshot"].status == "failed"
+
+@pytest.mark.asyncio
+async def test_stale_snapshot_rejected(stub, snapshot, monkeypatch):
+    """Тестирование отказа от устаревшего снимка."""
+    monkeypatch.setattr(fastest_source, "SNAPSHOT_MAX_AGE", 60)
+    stale = time.time() - 120
+    os.utime(snapshot, (stale, stale))
+    result = await tallest_hero_fastest("Male", True, sources=("api", "snapshot"), snapshot_path=snapshot)
+    assert result.source == "api"
+    assert "устарел" in result.reports["snapshot"].error
+
+@pytest.mark.asyncio
+async def test_no_source_available(stub, monkeypatch):
+    """Тестирование ошибки, если ни один источник не доступен."""
+    monkeypatch.setattr(tallest_hero_all, "ALL_HEROES_URL", f"{stub.url}/missing.json")
+    with pytest.raises(RuntimeError, match="Ни один источник"):
+        await tallest_hero_fastest("Male", True, sources=("all.json", "snapshot"))
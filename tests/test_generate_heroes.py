@@ -0,0 +1,55 @@
+import json
+
+import tallest_hero_all
+from generate_heroes import generate_changes, generate_heroes, to_api_response, write_all_json, write_api_responses
+
+
+def test_generate_heroes_deterministic():
+    """Тестирование воспроизводимости набора при одинаковом зерне."""
+    assert list(generate_heroes(50, seed=1)) == list(generate_heroes(50, seed=1))
+    assert list(generate_heroes(50, seed=1)) != list(generate_heroes(50, seed=2))
+
+def test_generate_heroes_distributions():
+    """Тестирование наличия всех вариантов пола, места работы и роста."""
+    heroes = list(generate_heroes(2000))
+    assert [hero["id"] for hero in heroes] == list(range(1, 2001))
+    assert {hero["appearance"]["gender"] for hero in heroes} == {"Male", "Female", "-"}
+    bases = {hero["work"]["base"] for hero in heroes}
+    assert {"-", ""} < bases
+    heights = [hero["appearance"]["height"][1] for hero in heroes]
+    assert any(height.endswith(" cm") for height in heights)
+    assert any(height.endswith(" meters") for height in heights)
+    invalid_heights = 0
+    for height in heights:
+        try:
+            tallest_hero_all.convert_height_to_cm(height)
+        except ValueError:
+            invalid_heights += 1
+    assert 0 < invalid_heights < len(heights) // 5
+
+def test_write_all_json(tmp_path):
+    """Тестирование потоковой записи файла в формате all.json."""
+    path = tmp_path / "all.json"
+    write_all_json(str(path), 100, seed=3)
+    content = path.read_bytes()
+    assert json.loads(content) == list(generate_heroes(100, seed=3))
+    assert tallest_hero_all.find_tallest_hero(content, "Male", True)["appearance"]["gender"] == "Male"
+
+def test_write_api_responses(tmp_path):
+    """Тестирование записи ответов API в формате JSON Lines."""
+    path = tmp_path / "api.jsonl"
+    write_api_responses(str(path), 10)
+    lines = path.read_text().splitlines()
+    assert len(lines) == 10
+    response = json.loads(lines[4])
+    assert response["response"] == "success"
+    assert response["id"] == "5"
+    assert "eye-color" in response["appearance"]
+    assert response == to_api_response(list(generate_heroes(10))[4])
+
+def test_generate_changes():
+    """Тестирование детерминированной ленты изменений."""
+    events = list(generate_changes(20, 100, seed=2))
+    assert events == list(generate_changes(20, 100, seed=2))
+    assert [event["hero"]["id"] for event in events[:20]] == list(range(1, 21))
+    assert {event["op"] for event in events[20:]} == {"insert", "update", "delete"}
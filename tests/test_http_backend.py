@@ -0,0 +1,67 @@
+import pytest
+import requests
+
+import asynch_tallest_hero
+import tallest_hero_all
+import http_backend
+from http_backend import DEFAULT_HEADERS, create_async_session, create_sync_session
+
+heroes = [
+    {
+        "id": 1,
+        "name": "Batman",
+        "appearance": {
+            "gender": "Male",
+            "height": ["6'2", "188 cm"]
+        },
+        "work": {
+            "base": "Gotham City"
+        }
+    },
+    {
+        "id": 2,
+        "name": "Robin",
+        "appearance": {
+            "gender": "Male",
+            "height": ["-", "185 cm"]
+        },
+        "work": {
+            "base": "-"
+        }
+    }
+]
+
+@pytest.fixture
+def stub(stub_api):
+    return stub_api(heroes)
+
+def test_default_headers_accept_gzip():
+    """Тестирование заголовка Accept-Encoding по умолчанию."""
+    assert "gzip" in DEFAULT_HEADERS["Accept-Encoding"]
+
+def test_create_sync_session_http2_unavailable(monkeypatch):
+    """Тестирование ошибки при запросе HTTP/2 без установленного httpx[http2]."""
+    monkeypatch.setattr(http_backend, "HTTP2_AVAILABLE", False)
+    with pytest.raises(RuntimeError):
+        create_sync_session(http2=True)
+
+@pytest.mark.slow
+def test_fetch_all_heroes_compressed(stub, monkeypatch):
+    """Тестирование загрузки all.json в сжатом виде."""
+    with create_sync_session() as session:
+        assert isinstance(session, requests.Session)
+        assert tallest_hero_all.fetch_all_heroes(session) == heroes
+    assert stub.requests_count == 1
+    assert stub.bytes_sent < len(stub.all_json)
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+@pytest.mark.parametrize("http2", [False, True])
+async def test_async_session_get_hero_info(stub, monkeypatch, http2):
+    """Тестирование получения героя через aiohttp и httpx."""
+    if http2:
+        pytest.importorskip("h2")
+        pytest.importorskip("httpx")
+    async with create_async_session(http2) as session:
+        result = await asynch_tallest_hero.get_hero_info(session, 2)
+    assert result["name"] == "Robin"
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+import json_decoder
+import synch_tallest_hero_api
+from json_decoder import (
+    DECODERS, CachedHero, SearchFields, cache_entries, decode_hero_list, decode_search_fields, get_decoder,
+    loads_many, materialize
+)
+
+hero = {
+    "id": 1,
+    "name": "Batman",
+    "appearance": {
+        "gender": "Male",
+        "height": ["6'2", "188 cm"]
+    },
+    "work": {
+        "occupation": "CEO of Wayne Enterprises",
+        "base": "Gotham City"
+    }
+}
+
+@pytest.mark.parametrize("backend", sorted(DECODERS))
+def test_get_decoder(backend):
+    """Тестирование декодирования всеми доступными декодерами."""
+    assert get_decoder(backend)(json.dumps(hero).encode()) == hero
+
+def test_get_decoder_unknown():
+    """Тестирование ошибки при неизвестном декодере."""
+    with pytest.raises(ValueError, match="недоступен"):
+        get_decoder("unknown")
+
+@pytest.mark.parametrize("use_msgspec", [True, False])
+def test_decode_search_fields(monkeypatch, use_msgspec):
+    """Тестирование декодирования только полей поиска."""
+    if not use_msgspec:
+        monkeypatch.setattr(json_decoder, "msgspec", None)
+    elif json_decoder.msgspec is None:
+        pytest.skip("msgspec не установлен")
+    assert decode_search_fields(json.dumps(hero).encode()) == SearchFields("Male", "188 cm", "Gotham City")
+    assert decode_search_fields(b'{"appearance": {"height": []}}') == SearchFields(None, "", "")
+
+@pytest.mark.parametrize("use_msgspec", [True, False])
+def test_decode_hero_list_materialize(monkeypatch, use_msgspec):
+    """Тестирование декодирования all.json и получения полного словаря героя."""
+    if not use_msgspec:
+        monkeypatch.setattr(json_decoder, "msgspec", None)
+    elif json_decoder.msgspec is None:
+        pytest.skip("msgspec не установлен")
+    heroes = decode_hero_list(json.dumps([hero, {"work": {"base": None}}]).encode())
+    assert [fields for fields, _ in heroes] == [
+        SearchFields("Male", "188 cm", "Gotham City"),
+        SearchFields(None, "", None),
+    ]
+    assert materialize(heroes[0][1]) == hero
+
+def test_loads_many():
+    """Тестирование декодирования пакета документов за один вызов."""
+    documents = [hero, {"id": 2, "name": "Robin"}]
+    assert loads_many([json.dumps(document).encode() for document in documents]) == documents
+    assert loads_many([]) == []
+
+@pytest.mark.parametrize("use_msgspec", [True, False])
+def test_cache_entries(monkeypatch, use_msgspec):
+    """Тестирование записей кэша: поля поиска и исходный JSON героя."""
+    if not use_msgspec:
+        monkeypatch.setattr(json_decoder, "msgspec", None)
+    elif json_decoder.msgspec is None:
+        pytest.skip("msgspec не установлен")
+    contents = [json.dumps(hero).encode(), b'{"appearance": {"gender": 1}}', b'{"id": 3}']
+    entries = cache_entries(contents)
+    assert [entry.fields for entry in entries] == [
+        SearchFields("Male", "188 cm", "Gotham City"),
+        SearchFields(1, "", ""),
+        SearchFields(None, "", ""),
+    ]
+    assert entries[0] == CachedHero(entries[0].fields, contents[0])
+    assert materialize(entries[0]) == hero
+
+@pytest.mark.parametrize("use_msgspec", [True, False])
+@pytest.mark.parametrize("has_job", [True, False])
+def test_null_base_matches_dict_path(monkeypatch, use_msgspec, has_job):
+    """Тестирование места работы null: поля поиска и словарь героя дают одинаковый результат."""
+    if not use_msgspec:
+        monkeypatch.setattr(json_decoder, "msgspec", None)
+    elif json_decoder.msgspec is None:
+        pytest.skip("msgspec не установлен")
+    null_base = dict(hero, work={"base": None})
+    fields = decode_search_fields(json.dumps(null_base).encode())
+    assert fields == SearchFields("Male", "188 cm", None)
+    assert cache_entries([json.dumps(null_base).encode()])[0].fields == fields
+    assert synch_tallest_hero_api.get_fields_height(fields, "Male", has_job) == \
+        synch_tallest_hero_api.get_hero_height(null_base, "Male", has_job)
@@ -0,0 +1,55 @@
+import argparse
+import asyncio
+import io
+import json
+import pstats
+
+import pytest
+
+import asynch_tallest_hero
+import profiling
+from generate_heroes import generate_heroes
+from profiling import Tracer, run, span
+
+
+def test_span_without_tracer():
+    """Тестирование отсутствия трассировки по умолчанию."""
+    assert profiling.active_tracer is None
+    with span("decode"):
+        pass
+    assert profiling.aiohttp_trace_configs() == []
+
+def test_tracer_summary_and_chrome_trace(tmp_path):
+    """Тестирование сводки и записи трассы в формате Chrome trace."""
+    tracer = Tracer()
+    tracer.add("request", 1.0, 1.5, url="http://example")
+    tracer.add("request", 2.0, 2.25)
+    tracer.add("decode", 3.0, 3.1)
+    summary = tracer.summary()
+    assert summary[0][:2] == ("request", 2)
+    assert summary[0][2] == pytest.approx(0.75)
+    path = tmp_path / "trace.json"
+    tracer.write(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+    assert len(events) == 3
+    assert events[0]["ph"] == "X"
+    assert events[0]["dur"] == pytest.approx(500000)
+
+@pytest.mark.slow
+def test_run_with_profile_and_trace(tmp_path, stub_api):
+    """Тестирование запуска запроса с профилированием и трассировкой."""
+    stub_api(generate_heroes(10))
+    args = argparse.Namespace(profile=str(tmp_path / "query.pstats"), trace=str(tmp_path / "trace.json"))
+    output = io.StringIO()
+    result = run(lambda: asyncio.run(asynch_tallest_hero.tallest_hero("Male", True)), args, stream=output)
+
+    assert result["appearance"]["gender"] == "Male"
+    assert profiling.active_tracer is None
+    names = [event["name"] for event in json.loads((tmp_path / "trace.json").read_text())["traceEvents"]]
+    assert names.count("request") == 10
+    # Поля поиска каждого героя и полный словарь найденного героя.
+    assert names.count("decode") == 11
+    assert names.count("filter") == 10
+    assert "connect" in names
+    assert pstats.Stats(args.profile).total_calls > 0
+    assert "Общее время" in output.getvalue()
@@ -0,0 +1,131 @@
+import json
+import os
+
+import pytest
+
+import tallest_hero_all
+from bounded_cache import BoundedCache
+from result_cache import ResultCache, content_version
+
+heroes = [
+    {
+        "id": 1,
+        "appearance": {
+            "gender": "Male",
+            "height": ["6'2", "188 cm"]
+        },
+        "work": {
+            "base": "Gotham City"
+        }
+    },
+    {
+        "id": 2,
+        "appearance": {
+            "gender": "Male",
+            "height": ["6'3", "191 cm"]
+        },
+        "work": {
+            "base": "-"
+        }
+    }
+]
+
+@pytest.fixture
+def stub(stub_api):
+    return stub_api(heroes)
+
+def test_result_cache_shared_between_instances(tmp_path):
+    """Тестирование общего кэша для разных экземпляров (процессов)."""
+    ResultCache(str(tmp_path)).put("all.json", "v1", "Male", True, heroes[0])
+    cache = ResultCache(str(tmp_path))
+    assert cache.get("all.json", "v1", "Male", True) == heroes[0]
+    assert cache.get("all.json", "v2", "Male", True) is None
+    assert cache.get("all.json", "v1", "Male", False) is None
+
+def test_result_replaced_by_new_version(tmp_path):
+    """Тестирование замены результата прежней версии без накопления файлов."""
+    cache = ResultCache(str(tmp_path))
+    for generation in range(5):
+        cache.put("api", f"generation:{generation}", "Male", True, heroes[0])
+    assert cache.get("api", "generation:4", "Male", True) == heroes[0]
+    assert cache.get("api", "generation:3", "Male", True) is None
+    assert len(os.listdir(tmp_path / "results")) == 1
+
+def test_fresh_version_expires(tmp_path):
+    """Тестирование перепроверки версии после revalidate_after секунд."""
+    cache = ResultCache(str(tmp_path), revalidate_after=60)
+    assert cache.fresh_version("all.json") is None
+    cache.save_version("all.json", "v1")
+    assert cache.fresh_version("all.json") == "v1"
+    assert ResultCache(str(tmp_path), revalidate_after=-1).fresh_version("all.json") is None
+
+def test_current_generation(tmp_path):
+    """Тестирование версии для источников без ETag."""
+    cache = ResultCache(str(tmp_path))
+    generation = cache.current_generation("api")
+    assert cache.current_generation("api") == generation
+    assert ResultCache(str(tmp_path), revalidate_after=-1).current_generation("api") != generation
+
+def test_content_version():
+    """Тестирование версии по хэшу содержимого."""
+    assert content_version(b"[]") == content_version(b"[]")
+    assert content_version(b"[]") != content_version(b"[{}]")
+
+@pytest.mark.slow
+def test_get_tallest_hero_cached_without_network(stub, tmp_path):
+    """Тестирование повторного запроса без обращения к сети."""
+    cache = ResultCache(str(tmp_path))
+    assert tallest_hero_all.get_tallest_hero_cached("Male", True, cache=cache)["id"] == 1
+    requests_count = stub.requests_count
+    assert tallest_hero_all.get_tallest_hero_cached("Male", True, cache=cache)["id"] == 1
+    assert stub.requests_count == requests_count
+
+@pytest.mark.slow
+def test_get_tallest_hero_cached_revalidation(stub, tmp_path):
+    """Тестирование инвалидации результата при изменении all.json."""
+    cache = ResultCache(str(tmp_path), revalidate_after=-1)
+    assert tallest_hero_all.get_tallest_hero_cached("Male", False, cache=cache)["id"] == 2
+
+    stub.reset_stats()
+    assert tallest_hero_all.get_tallest_hero_cached("Male", False, cache=cache)["id"] == 2
+    assert (stub.requests_count, stub.bytes_sent) == (1, 0)
+
+    stub.set_heroes(heroes[:1])
+    assert tallest_hero_all.get_tallest_hero_cached("Male", False, cache=cache) == {}
+
+@pytest.mark.slow
+def test_get_tallest_hero_cached_error_not_versioned(stub, tmp_path, monkeypatch):
+    """Тестирование ошибки без сохранения версии, если all.json недоступен."""
+    missing_url = f"{stub.url}/missing.json"
+    monkeypatch.setattr(tallest_hero_all, "ALL_HEROES_URL", missing_url)
+    cache = ResultCache(str(tmp_path))
+    with pytest.raises(RuntimeError, match="404"):
+        tallest_hero_all.get_tallest_hero_cached("Male", True, cache=cache)
+    assert cache.fresh_version(missing_url) is None
+
+    cache.save_version(missing_url, "v1")
+    with pytest.raises(RuntimeError, match="404"):
+        tallest_hero_all.get_tallest_hero_cached("Male", True, cache=cache)
+    assert cache.fresh_version(missing_url) == "v1"
+
+@pytest.mark.slow
+def test_get_tallest_hero_cached_uses_shared_cache(stub, tmp_path, monkeypatch):
+    """Тестирование загрузки all.json через общий кэш процессов."""
+    shared = BoundedCache()
+    shared[("all.json", tallest_hero_all.ALL_HEROES_URL)] = json.dumps(heroes[1:]).encode()
+    monkeypatch.setattr(tallest_hero_all, "shared_cache", shared)
+    cache = ResultCache(str(tmp_path))
+    cache.save_version(tallest_hero_all.ALL_HEROES_URL, "v1")
+    assert tallest_hero_all.get_tallest_hero_cached("Male", False, cache=cache)["id"] == 2
+    assert stub.requests_count == 0
+
+@pytest.mark.slow
+def test_get_tallest_hero_cached_keeps_etag_version(stub, tmp_path):
+    """Тестирование повторных разных запросов без обращения к сети при сохранённом ETag."""
+    cache = ResultCache(str(tmp_path))
+    assert tallest_hero_all.get_tallest_hero_cached("Male", True, cache=cache)["id"] == 1
+    assert tallest_hero_all.get_tallest_hero_cached("Male", False, cache=cache)["id"] == 2
+    stub.reset_stats()
+    assert tallest_hero_all.get_tallest_hero_cached("Male", True, cache=cache)["id"] == 1
+    assert tallest_hero_all.get_tallest_hero_cached("Male", False, cache=cache)["id"] == 2
+    assert stub.requests_count == 0
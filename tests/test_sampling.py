@@ -0,0 +1,34 @@
+import pytest
+
+from sampling import confidence, stratified_order
+
+
+def test_stratified_order_is_permutation():
+    """Тестирование обхода всех ID ровно один раз."""
+    order = stratified_order(1, 731, seed=1)
+    assert sorted(order) == list(range(1, 732))
+
+
+def test_stratified_order_prefix_covers_strata():
+    """Тестирование выборки: первые k * strata ID берутся поровну из каждой части."""
+    order = stratified_order(1, 160, strata=16, seed=2)
+    prefix = order[:32]
+    assert sorted((hero_id - 1) // 10 for hero_id in prefix) == sorted(list(range(16)) * 2)
+
+
+def test_stratified_order_seed():
+    """Тестирование воспроизводимости порядка при одинаковом seed."""
+    assert stratified_order(1, 100, seed=3) == stratified_order(1, 100, seed=3)
+    assert stratified_order(1, 100, seed=3) != stratified_order(1, 100, seed=4)
+
+
+def test_stratified_order_small_range():
+    """Тестирование диапазона, меньшего количества частей."""
+    assert sorted(stratified_order(1, 3, strata=16)) == [1, 2, 3]
+    assert stratified_order(1, 0) == []
+
+
+@pytest.mark.parametrize("checked, total, expected", [(0, 10, 0.0), (5, 10, 0.5), (10, 10, 1.0), (0, 0, 1.0)])
+def test_confidence(checked, total, expected):
+    """Тестирование оценки достоверности предварительного ответа."""
+    assert confidence(checked, total) == expected
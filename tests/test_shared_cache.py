@@ -0,0 +1,212 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import asynch_tallest_hero
+import shared_cache
+import synch_tallest_hero_api
+import tallest_hero_all
+from bounded_cache import BoundedCache
+from generate_heroes import generate_heroes
+from http_backend import create_async_session
+from shared_cache import SharedCache, SharedStore, start_daemon
+
+heroes = list(generate_heroes(30, seed=11))
+
+@pytest.fixture(scope="module")
+def address(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("shared") / "cache.sock")
+    daemon = start_daemon(path)
+    yield path
+    daemon.terminate()
+    daemon.wait()
+
+@pytest.fixture
+def cache(address):
+    cache = SharedCache(address)
+    cache.clear()
+    return cache
+
+@pytest.fixture
+def stub(stub_api, monkeypatch, cache):
+    monkeypatch.setattr(tallest_hero_all, "shared_cache", cache)
+    for module in (asynch_tallest_hero, synch_tallest_hero_api):
+        monkeypatch.setattr(module, "hero_cache", cache)
+    return stub_api(heroes)
+
+@pytest.mark.slow
+def test_mapping_interface(cache):
+    """Тестирование работы общего кэша как словаря."""
+    assert cache.get(1) is None
+    cache[1] = {"name": "Batman"}
+    assert cache.get(1) == {"name": "Batman"}
+    assert cache[1] == {"name": "Batman"}
+    assert 1 in cache and len(cache) == 1
+    del cache[1]
+    with pytest.raises(KeyError):
+        cache[1]
+
+def test_single_flight_between_owners():
+    """Тестирование ожидания записи, которую загружает другой процесс."""
+    store = SharedStore(BoundedCache())
+    assert store.get(1, owner="a") is None
+    result = {}
+    waiter = threading.Thread(target=lambda: result.setdefault("value", store.get(1, owner="b")))
+    waiter.start()
+    time.sleep(0.05)
+    store.set(1, {"name": "Batman"})
+    waiter.join(timeout=1)
+    assert result["value"] == {"name": "Batman"}
+    assert store.stats()["waits"] == 1
+
+def test_same_owner_does_not_wait():
+    """Тестирование повторного запроса ключа тем же процессом без ожидания."""
+    store = SharedStore(BoundedCache())
+    assert store.get(1, owner="a") is None
+    assert store.get(1, owner="a") is None
+    assert store.stats()["waits"] == 0
+
+def test_claim_expires_and_release():
+    """Тестирование истечения и отмены права на загрузку записи."""
+    store = SharedStore(BoundedCache(), claim_timeout=0.05)
+    assert store.get(1, owner="a") is None
+    started = time.monotonic()
+    assert store.get(1, owner="b") is None
+    assert time.monotonic() - started < 1
+    store.release(1, owner="b")
+    assert store.get(1, owner="c") is None
+    assert store.stats()["claims"] == 1
+
+def test_wait_bounded_by_timeout():
+    """Тестирование ожидания записи не дольше timeout без перезакрепления ключа."""
+    store = SharedStore(BoundedCache())
+    assert store.get(1, owner="a") is None
+    started = time.monotonic()
+    assert store.get(1, owner="b", timeout=0.05) is None
+    assert time.monotonic() - started < 1
+    store.release(1, owner="b")
+    assert store.stats()["claims"] == 1
+    store.release(1, owner="a")
+    assert store.stats()["claims"] == 0
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_catalogue_fetched_once(stub, cache):
+    """Тестирование однократной загрузки героев обоими модулями API через общий кэш."""
+    expected = await asynch_tallest_hero.tallest_hero("Male", True)
+    assert stub.requests_count == len(heroes)
+    assert len(cache) == len(heroes)
+    hero = await asyncio.to_thread(synch_tallest_hero_api.get_tallest_hero, "Male", True)
+    assert hero == expected
+    assert stub.requests_count == len(heroes)
+
+@pytest.mark.slow
+def test_all_json_fetched_once(stub):
+    """Тестирование загрузки all.json один раз через общий кэш."""
+    first = tallest_hero_all.fetch_all_heroes_raw()
+    second = tallest_hero_all.fetch_all_heroes_raw()
+    assert first == second
+    assert stub.requests_count == 1
+
+def test_connect_from_env_falls_back(monkeypatch, tmp_path):
+    """Тестирование локального кэша, если демон общего кэша недоступен."""
+    monkeypatch.setattr(shared_cache, "SHARED_CACHE_ADDRESS", str(tmp_path / "missing.sock"))
+    with pytest.warns(UserWarning, match="недоступен"):
+        cache = shared_cache.hero_cache_from_env(default_max_entries=731)
+    assert isinstance(cache, BoundedCache)
+    monkeypatch.setattr(shared_cache, "SHARED_CACHE_ADDRESS", None)
+    assert shared_cache.connect_from_env() is None
+
+@pytest.mark.slow
+def test_get_many_and_set_many(cache):
+    """Тестирование пакетного чтения и записи за одно обращение к демону."""
+    cache.set_many({1: {"name": "Batman"}, 2: {"name": "Robin"}})
+    assert cache.get_many([1, 2, 3]) == {1: {"name": "Batman"}, 2: {"name": "Robin"}}
+    assert cache.stats()["claims"] == 1
+    cache.release_many([3])
+    assert cache.stats()["claims"] == 0
+
+def test_get_many_single_flight_between_owners():
+    """Тестирование ожидания пакета героев, которые загружает другой процесс."""
+    store = SharedStore(BoundedCache())
+    assert store.get_many([1, 2], owner="a") == {}
+    result = {}
+    waiter = threading.Thread(target=lambda: result.update(store.get_many([1, 2, 3], owner="b")))
+    waiter.start()
+    time.sleep(0.05)
+    store.set_many({1: {"name": "Batman"}, 2: {"name": "Robin"}})
+    waiter.join(timeout=1)
+    assert result == {1: {"name": "Batman"}, 2: {"name": "Robin"}}
+    assert store.stats()["waits"] == 1
+    store.release_many([1, 2, 3], owner="a")
+    assert store.stats()["claims"] == 1
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_batch_claims_released(stub, cache, monkeypatch):
+    """Тестирование закрепления и снятия героев пакетной загрузкой."""
+    await asynch_tallest_hero.tallest_hero_batched("Male", True, chunk_size=7)
+    assert len(cache) == len(heroes) and cache.stats()["claims"] == 0
+    cache.clear()
+    for module in (asynch_tallest_hero, synch_tallest_hero_api):
+        monkeypatch.setattr(module, "MAX_ID", len(heroes) + 5)
+    with pytest.raises(RuntimeError, match="404"):
+        await asynch_tallest_hero.tallest_hero_batched("Male", True, chunk_size=7)
+    with pytest.raises(RuntimeError, match="404"):
+        await asyncio.to_thread(synch_tallest_hero_api.get_tallest_hero_batched, "Male", True, chunk_size=7)
+    assert cache.stats()["claims"] == 0
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_claim_released_after_error(stub, cache, monkeypatch):
+    """Тестирование снятия закрепления ключа после ошибки запроса."""
+    with pytest.raises(RuntimeError, match="404"):
+        synch_tallest_hero_api.get_hero_info(999)
+    async with create_async_session(False) as session:
+        with pytest.raises(RuntimeError, match="404"):
+            await asynch_tallest_hero.get_hero_info(session, 998)
+    monkeypatch.setattr(tallest_hero_all, "ALL_HEROES_URL", f"{stub.url}/missing.json")
+    with pytest.raises(RuntimeError, match="404"):
+        tallest_hero_all.fetch_all_heroes_raw()
+    assert cache.stats()["claims"] == 0
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_cancelled_lookup_releases_claim(stub, cache, address):
+    """Тестирование снятия закрепления, полученного после отмены ожидания общего кэша."""
+    other = SharedCache(address)
+    other._store.get(1, "other")
+    async with create_async_session(False) as session:
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(asynch_tallest_hero._get_hero_entry(session, 1, cache), 0.1)
+    other._store.release(1, "other")
+    for _ in range(100):
+        await asyncio.sleep(0.01)
+        if cache.stats()["claims"] == 0:
+            break
+    assert cache.stats()["claims"] == 0
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_async_deadline_bounds_claim_wait(stub, cache, address):
+    """Тестирование срока асинхронного поиска, если героя загружает другой процесс."""
+    other = SharedCache(address)
+    other._store.get(1, "other")
+    started = time.monotonic()
+    result = await asynch_tallest_hero.tallest_hero_within("Male", True, timeout=0.2)
+    await asyncio.sleep(0.3)
+    assert cache.stats()["claims"] == 1
+    assert time.monotonic() - started < 1
+    assert result.is_complete is False
+
+@pytest.mark.slow
+def test_deadline_bounds_claim_wait(stub, cache, address):
+    """Тестирование срока поиска, если героя загружает другой процесс."""
+    other = SharedCache(address)
+    other._store.get(1, "other")
+    started = time.monotonic()
+    result = synch_tallest_hero_api.get_tallest_hero_within("Male", True, timeout=0.2)
+    assert time.monotonic() - started < 1
+    assert result.is_complete is False
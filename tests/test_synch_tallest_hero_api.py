@@ -1,15 +1,35 @@
+import json
 import os
+import time
 
 import pytest
+import requests
 import requests_mock
 from dotenv import load_dotenv
 from unittest.mock import patch
 
-from synch_tallest_hero_api import get_hero_info, convert_height_to_cm, get_tallest_hero
+import synch_tallest_hero_api
+from bounded_cache import BoundedCache
+from generate_heroes import generate_heroes
+from json_decoder import cache_entries, materialize
+from result_cache import ResultCache
+from synch_tallest_hero_api import (
+    get_hero_info, convert_height_to_cm, get_tallest_hero, get_tallest_hero_within, get_tallest_hero_cached,
+    get_tallest_hero_preview
+)
 
 load_dotenv()
 ACCESS_TOKEN = os.getenv("ACCESS_TOKEN")
 
+
+def as_entry(hero: dict):
+    """Запись кэша героев (CachedHero) для словаря героя."""
+    return cache_entries([json.dumps(hero).encode()])[0]
+
+def entries_from(heroes: dict):
+    """Замена _get_hero_entry, возвращающая записи кэша для словарей героев."""
+    return lambda hero_id, session=None, timeout=None, cache=None: as_entry(heroes[hero_id])
+
 @pytest.mark.parametrize("input_height, expected_output", [
     ("179 cm", 179),
     ("0 cm", 0),
@@ -72,6 +92,17 @@ def test_get_hero_info_cache():
     assert hero_info_first_call == hero_info_second_call
     assert m.call_count == 1
 
+def test_get_hero_info_injected_cache():
+    """Тестирование переданного кэша: модульный hero_cache не используется."""
+    cache = BoundedCache()
+    with requests_mock.Mocker() as m:
+        m.get(f"https://superheroapi.com/api/{ACCESS_TOKEN}/1", status_code=200, json=mock_hero_response[0])
+        get_hero_info(1, cache=cache)
+        get_hero_info(1, cache=cache)
+    assert m.call_count == 1
+    assert materialize(cache[1]) == mock_hero_response[0]
+    assert 1 not in synch_tallest_hero_api.hero_cache
+
 def test_get_hero_info_success():
     """Тестирование успешного получения информации о герое."""
     with requests_mock.Mocker() as m:
@@ -158,60 +189,60 @@ def mock_hero_cache():
     }
     return mock_hero_cache
 
-@patch('synch_tallest_hero_api.get_hero_info')
+@patch('synch_tallest_hero_api._get_hero_entry')
 @patch('synch_tallest_hero_api.MAX_ID', new=6)
-def test_get_tallest_hero_male_with_job(mock_get_hero_info, mock_hero_cache):
+def test_get_tallest_hero_male_with_job(mock_get_hero_entry, mock_hero_cache):
     """
     Тестирование функции get_tallest_hero для героев
     мужского пола с заполненным местом работы.
     """
-    mock_get_hero_info.side_effect = lambda hero_id: mock_hero_cache[hero_id]
+    mock_get_hero_entry.side_effect = entries_from(mock_hero_cache)
     result = get_tallest_hero("Male", True)
     assert result["appearance"]["height"][1] == "191 cm"
     assert result["appearance"]["gender"] == "Male"
     assert result["work"]["base"] == "Metropolis"
 
 
-@patch('synch_tallest_hero_api.get_hero_info')
+@patch('synch_tallest_hero_api._get_hero_entry')
 @patch('synch_tallest_hero_api.MAX_ID', new=6)
-def test_get_tallest_hero_male_without_job(mock_get_hero_info, mock_hero_cache):
+def test_get_tallest_hero_male_without_job(mock_get_hero_entry, mock_hero_cache):
     """
     Тестирование функции get_tallest_hero для героев
     мужского пола без работы.
     """
-    mock_get_hero_info.side_effect = lambda hero_id: mock_hero_cache[hero_id]
+    mock_get_hero_entry.side_effect = entries_from(mock_hero_cache)
     result = get_tallest_hero("Male", False)
     assert result["appearance"]["height"][1] == "173 cm"
     assert result["appearance"]["gender"] == "Male"
     assert result["work"]["base"] == "-"
 
-@patch('synch_tallest_hero_api.get_hero_info')
+@patch('synch_tallest_hero_api._get_hero_entry')
 @patch('synch_tallest_hero_api.MAX_ID', new=6)
-def test_get_tallest_hero_female_with_job(mock_get_hero_info, mock_hero_cache):
+def test_get_tallest_hero_female_with_job(mock_get_hero_entry, mock_hero_cache):
     """
     Тестирование функции get_tallest_hero для героев
     женского пола с заполненным местом работы.
     """
-    mock_get_hero_info.side_effect = lambda hero_id: mock_hero_cache[hero_id]
+    mock_get_hero_entry.side_effect = entries_from(mock_hero_cache)
     result = get_tallest_hero("Female", True)
     assert result["appearance"]["height"][1] == "175 cm"
     assert result["appearance"]["gender"] == "Female"
     assert result["work"]["base"] == "Earth"
 
-@patch('synch_tallest_hero_api.get_hero_info')
+@patch('synch_tallest_hero_api._get_hero_entry')
 @patch('synch_tallest_hero_api.MAX_ID', new=6)
-def test_get_tallest_hero_female_without_job(mock_get_hero_info, mock_hero_cache):
+def test_get_tallest_hero_female_without_job(mock_get_hero_entry, mock_hero_cache):
     """
     Тестирование функции get_tallest_hero для героев
     женского пола без работы.
     """
-    mock_get_hero_info.side_effect = lambda hero_id: mock_hero_cache[hero_id]
+    mock_get_hero_entry.side_effect = entries_from(mock_hero_cache)
     result = get_tallest_hero("Female", False)
     assert result["appearance"]["height"][1] == "179 cm"
     assert result["appearance"]["gender"] == "Female"
     assert result["work"]["base"] == "-"
 
-@patch('synch_tallest_hero_api.get_hero_info')
+@patch('synch_tallest_hero_api._get_hero_entry')
 @patch('synch_tallest_hero_api.MAX_ID', new=2)
 def test_invalid_height_format(mock_hero_cache):
     """
@@ -242,7 +273,7 @@ def test_invalid_height_format(mock_hero_cache):
         result = get_tallest_hero("Male", True)        
         assert result == {}
 
-@patch('synch_tallest_hero_api.get_hero_info')
+@patch('synch_tallest_hero_api._get_hero_entry')
 def test_no_heroes_found(mock_hero_cache):
     """
     Тестирование функции get_tallest_hero
@@ -250,4 +281,157 @@ def test_no_heroes_found(mock_hero_cache):
     """
     mock_hero_cache.clear()
     result = get_tallest_hero("Male", True)
-    assert result == {}
\ No newline at end of file
+    assert result == {}
+
+@patch('synch_tallest_hero_api._get_hero_entry')
+@patch('synch_tallest_hero_api.MAX_ID', new=6)
+def test_get_tallest_hero_within_request_timeout(mock_get_hero_entry, mock_hero_cache):
+    """
+    Тестирование функции get_tallest_hero_within при тайм-ауте
+    запроса: возвращается лучший из проверенных героев.
+    """
+    def get_hero_entry_with_timeout(hero_id, session=None, timeout=None, cache=None):
+        if hero_id == 2:
+            raise requests.Timeout()
+        return as_entry(mock_hero_cache[hero_id])
+
+    mock_get_hero_entry.side_effect = get_hero_entry_with_timeout
+    result = get_tallest_hero_within("Male", True, timeout=5)
+    assert result.is_complete is False
+    assert result.hero["appearance"]["height"][1] == "178 cm"
+    assert mock_get_hero_entry.call_count == 2
+
+@patch('synch_tallest_hero_api._get_hero_entry')
+@patch('synch_tallest_hero_api.MAX_ID', new=6)
+def test_get_tallest_hero_within_deadline(mock_get_hero_entry, mock_hero_cache):
+    """
+    Тестирование функции get_tallest_hero_within: после истечения
+    времени новые запросы не отправляются.
+    """
+    def slow_get_hero_entry(hero_id, session=None, timeout=None, cache=None):
+        time.sleep(0.05)
+        return as_entry(mock_hero_cache[hero_id])
+
+    mock_get_hero_entry.side_effect = slow_get_hero_entry
+    result = get_tallest_hero_within("Male", True, timeout=0.01)
+    assert result.is_complete is False
+    assert mock_get_hero_entry.call_count == 1
+    assert mock_get_hero_entry.call_args.kwargs["timeout"] <= 0.01
+
+@patch('synch_tallest_hero_api._get_hero_entry')
+@patch('synch_tallest_hero_api.MAX_ID', new=6)
+def test_get_tallest_hero_within_late_response(mock_get_hero_entry, mock_hero_cache):
+    """
+    Тестирование функции get_tallest_hero_within: герой, ответ о котором
+    пришёл позже срока, не учитывается.
+    """
+    def late_get_hero_entry(hero_id, session=None, timeout=None, cache=None):
+        if hero_id == 2:
+            time.sleep(0.1)
+        return as_entry(mock_hero_cache[hero_id])
+
+    mock_get_hero_entry.side_effect = late_get_hero_entry
+    result = get_tallest_hero_within("Male", True, timeout=0.05)
+    assert result.is_complete is False
+    assert result.hero["appearance"]["height"][1] == "178 cm"
+    assert mock_get_hero_entry.call_count == 2
+
+def test_get_tallest_hero_cached(tmp_path, mock_hero_cache):
+    """
+    Тестирование функции get_tallest_hero_cached: повторный
+    запрос не обходит героев.
+    """
+    cache = ResultCache(str(tmp_path))
+    with patch('synch_tallest_hero_api.get_tallest_hero', return_value=mock_hero_cache[2]) as mock_get_tallest_hero:
+        first_result = get_tallest_hero_cached("Male", True, cache=cache)
+        second_result = get_tallest_hero_cached("Male", True, cache=cache)
+    assert first_result == second_result == mock_hero_cache[2]
+    assert mock_get_tallest_hero.call_count == 1
+
+@patch('synch_tallest_hero_api._get_hero_entry')
+@patch('synch_tallest_hero_api.MAX_ID', new=6)
+def test_get_tallest_hero_preview_refines(mock_get_hero_entry, mock_hero_cache):
+    """
+    Тестирование предварительного ответа get_tallest_hero_preview:
+    по истечении budget возвращается лучший из проверенных героев,
+    а точный ответ вычисляется в фоновом потоке.
+    """
+    def slow_get_hero_entry(hero_id, session=None, timeout=None, cache=None):
+        if hero_id == 2:
+            time.sleep(0.3)
+        return as_entry(mock_hero_cache[hero_id])
+
+    mock_get_hero_entry.side_effect = slow_get_hero_entry
+    preview = get_tallest_hero_preview("Male", True, budget=0.1, seed=1)
+    assert preview.checked < preview.total == 6
+    assert preview.confidence == pytest.approx(preview.checked / 6)
+    assert preview.exact.result(timeout=5)["appearance"]["height"][1] == "191 cm"
+
+@patch('synch_tallest_hero_api._get_hero_entry')
+@patch('synch_tallest_hero_api.MAX_ID', new=6)
+def test_get_tallest_hero_preview_sample_size(mock_get_hero_entry, mock_hero_cache):
+    """
+    Тестирование get_tallest_hero_preview: предварительный ответ
+    возвращается после проверки sample_size героев.
+    """
+    mock_get_hero_entry.side_effect = entries_from(mock_hero_cache)
+    preview = get_tallest_hero_preview("Female", False, budget=None, sample_size=3, seed=2)
+    assert 3 <= preview.checked <= 6
+    assert preview.exact.result(timeout=5) == get_tallest_hero("Female", False)
+
+@patch('synch_tallest_hero_api._get_hero_entry')
+@patch('synch_tallest_hero_api.MAX_ID', new=6)
+def test_get_tallest_hero_preview_error(mock_get_hero_entry):
+    """Тестирование ошибки запроса до предварительного ответа."""
+    mock_get_hero_entry.side_effect = RuntimeError("Ошибка при получении информации о герое с ID 1: 404")
+    with pytest.raises(RuntimeError, match="404"):
+        get_tallest_hero_preview("Male", True, budget=1)
+
+@pytest.fixture
+def batch_stub(stub_api):
+    return stub_api(generate_heroes(40, seed=4))
+
+@pytest.mark.slow
+@pytest.mark.parametrize("gender, has_job", [("Male", True), ("Female", False)])
+def test_get_tallest_hero_batched_matches(batch_stub, gender, has_job):
+    """Тестирование совпадения пакетной загрузки с последовательной."""
+    batched = synch_tallest_hero_api.get_tallest_hero_batched(gender, has_job, chunk_size=7, connections=3)
+    synch_tallest_hero_api.hero_cache.clear()
+    assert batched == get_tallest_hero(gender, has_job)
+
+@pytest.mark.slow
+def test_iter_hero_batches_order_and_cache(batch_stub):
+    """Тестирование порядка пакетов и загрузки только отсутствующих в кэше героев."""
+    synch_tallest_hero_api.hero_cache[3] = cache_entries([b'{"id": "3", "name": "Cached"}'])[0]
+    batches = list(synch_tallest_hero_api.iter_hero_batches([1, 2, 3, 4, 5], chunk_size=2, connections=2))
+    assert [[hero_id for hero_id, _ in batch] for batch in batches] == [[1, 2], [3, 4], [5]]
+    assert materialize(batches[1][0][1])["name"] == "Cached"
+    assert batch_stub.requests_count == 4
+
+@pytest.mark.slow
+def test_iter_hero_batches_error(batch_stub):
+    """Тестирование ошибки пакетной загрузки для несуществующего героя."""
+    with pytest.raises(RuntimeError, match="404"):
+        list(synch_tallest_hero_api.iter_hero_batches([1, 99], chunk_size=1))
+
+@pytest.mark.slow
+def test_get_tallest_hero_batched_injected_cache(batch_stub):
+    """Тестирование пакетного поиска с отдельным кэшем героев."""
+    cache = BoundedCache()
+    hero = synch_tallest_hero_api.get_tallest_hero_batched("Male", True, chunk_size=7, cache=cache)
+    assert hero
+    assert len(cache) == 40
+    assert len(synch_tallest_hero_api.hero_cache) == 0
+
+@pytest.mark.slow
+def test_get_tallest_hero_injected_session_and_cache(batch_stub):
+    """Тестирование поиска с переданными сессией и кэшем героев."""
+    cache = BoundedCache()
+    with requests.Session() as session:
+        hero = get_tallest_hero("Male", True, session=session, cache=cache)
+        preview = get_tallest_hero_preview("Male", True, budget=None, session=session, cache=cache)
+        assert preview.exact.result(timeout=5) == hero
+        assert get_tallest_hero_within("Male", True, timeout=5, session=session, cache=cache).is_complete
+    assert len(cache) == 40
+    assert len(synch_tallest_hero_api.hero_cache) == 0
+    assert batch_stub.requests_count == 40
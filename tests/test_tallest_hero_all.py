@@ -1,3 +1,5 @@
+import json
+
 import pytest
 from unittest.mock import patch
 from tallest_hero_all import convert_height_to_cm, get_tallest_hero
@@ -106,7 +108,8 @@ def test_get_tallest_hero_male_with_job(mock_api_response):
     мужского пола с заполненным местом работы.
     """
     with patch('requests.get') as mock_get:
-        mock_get.return_value.json.return_value = mock_api_response
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = json.dumps(mock_api_response).encode()
         result = get_tallest_hero("Male", True)
         assert result["appearance"]["height"][1] == "191 cm"
         assert result["appearance"]["gender"] == "Male"
@@ -118,7 +121,8 @@ def test_get_tallest_hero_male_without_job(mock_api_response):
     мужского пола без работы.
     """
     with patch('requests.get') as mock_get:
-        mock_get.return_value.json.return_value = mock_api_response
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = json.dumps(mock_api_response).encode()
         result = get_tallest_hero("Male", False)
         assert result["appearance"]["height"][1] == "173 cm"
         assert result["appearance"]["gender"] == "Male"
@@ -130,7 +134,8 @@ def test_get_tallest_hero_female_with_job(mock_api_response):
     женского пола с заполненным местом работы.
     """
     with patch('requests.get') as mock_get:
-        mock_get.return_value.json.return_value = mock_api_response
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = json.dumps(mock_api_response).encode()
         result = get_tallest_hero("Female", True)
         assert result["appearance"]["height"][1] == "175 cm"
         assert result["appearance"]["gender"] == "Female"
@@ -142,7 +147,8 @@ def test_get_tallest_hero_female_without_job(mock_api_response):
     женского пола без работы.
     """
     with patch('requests.get') as mock_get:
-        mock_get.return_value.json.return_value = mock_api_response
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = json.dumps(mock_api_response).encode()
         result = get_tallest_hero("Female", False)
         assert result["appearance"]["height"][1] == "179 cm"
         assert result["appearance"]["gender"] == "Female"
@@ -154,7 +160,8 @@ def test_no_heroes_found():
     при отсутствии героев.
     """
     with patch('requests.get') as mock_get:
-        mock_get.return_value.json.return_value = []
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = b"[]"
         result = get_tallest_hero("Male", True)
         assert result == {}
 
@@ -164,7 +171,8 @@ def test_invalid_height_format():
     при некорректном формате роста.
     """
     with patch('requests.get') as mock_get:
-        mock_get.return_value.json.return_value = [
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = json.dumps([
             {
                 "appearance": {
                     "gender": "Male",
@@ -183,6 +191,18 @@ def test_invalid_height_format():
                     "base": "Gotham2"
                 }
             }
-        ]
+        ]).encode()
         result = get_tallest_hero("Male", True)
-        assert result == {}
\ No newline at end of file
+        assert result == {}
+
+def test_get_tallest_hero_null_base_counts_as_job(mock_api_response):
+    """
+    Тестирование функции get_tallest_hero: место работы null
+    считается работой, как в get_hero_height.
+    """
+    mock_api_response.append({"appearance": {"gender": "Male", "height": ["7'0", "213 cm"]}, "work": {"base": None}})
+    with patch('requests.get') as mock_get:
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = json.dumps(mock_api_response).encode()
+        assert get_tallest_hero("Male", True)["appearance"]["height"][1] == "213 cm"
+        assert get_tallest_hero("Male", False)["appearance"]["height"][1] == "173 cm"
@@ -0,0 +1,90 @@
+import pytest
+
+import tallest_hero_all
+from generate_heroes import generate_changes, to_api_response, write_change_log
+from json_decoder import extract_search_fields
+from tallest_hero_index import COMPACT_SLACK, TallestHeroIndex
+
+def make_hero(hero_id, height, gender="Male", base="Gotham City"):
+    return {"id": hero_id, "name": f"Hero {hero_id}",
+            "appearance": {"gender": gender, "height": ["-", height]}, "work": {"base": base}}
+
+def expected_tallest(state: dict, gender: str, has_job: bool) -> dict:
+    heroes = [(extract_search_fields(hero), hero) for _, hero in sorted(state.items())]
+    return tallest_hero_all.find_tallest_document(heroes, gender, has_job) or {}
+
+def test_matches_full_recomputation(tmp_path):
+    """Тестирование совпадения с полным пересчётом после каждого события ленты."""
+    index = TallestHeroIndex()
+    state = {}
+    for number, event in enumerate(generate_changes(50, 500, seed=3)):
+        index.apply(event)
+        if event["op"] == "delete":
+            state.pop(event["id"], None)
+        else:
+            state[event["hero"]["id"]] = event["hero"]
+        if number % 25 == 0:
+            for gender in ["Male", "Female"]:
+                for has_job in [True, False]:
+                    assert index.tallest(gender, has_job) == expected_tallest(state, gender, has_job)
+    assert len(index) == len(state)
+
+def test_update_moves_hero_between_groups():
+    """Тестирование изменения роста, пола и места работы героя."""
+    index = TallestHeroIndex.from_heroes([make_hero(1, "200 cm"), make_hero(2, "180 cm")])
+    assert index.tallest("Male", True)["id"] == 1
+    index.apply({"op": "update", "hero": make_hero(1, "200 cm", base="-")})
+    assert index.tallest("Male", True)["id"] == 2
+    assert index.tallest("Male", False)["id"] == 1
+    index.apply({"op": "update", "hero": make_hero(2, "210 cm", gender="Female")})
+    assert index.tallest("Male", True) == {}
+    assert index.tallest("Female", True)["id"] == 2
+
+def test_delete_and_invalid_height():
+    """Тестирование удаления героя и пропуска героев с некорректным ростом."""
+    index = TallestHeroIndex.from_heroes([make_hero(1, "200 cm"), make_hero(2, "Unknown"), make_hero(3, "2.5 meters")])
+    assert index.tallest("Male", True)["id"] == 3
+    index.apply({"op": "delete", "id": 3})
+    index.apply({"op": "delete", "id": 2})
+    index.apply({"op": "delete", "id": 42})
+    assert 3 not in index and 2 not in index
+    assert index.tallest("Male", True)["id"] == 1
+
+def test_top_and_ties():
+    """Тестирование k самых высоких героев и выбора меньшего ID при равном росте."""
+    index = TallestHeroIndex.from_heroes([make_hero(3, "190 cm"), make_hero(1, "190 cm"), make_hero(2, "200 cm")])
+    assert [hero["id"] for hero in index.top("Male", True, 5)] == [2, 1, 3]
+    assert [hero["id"] for hero in index.top("Male", True, 2)] == [2, 1]
+    assert index.top("Female", True, 3) == []
+
+def test_api_format_heroes():
+    """Тестирование героев в формате API со строковыми ID."""
+    index = TallestHeroIndex.from_heroes([to_api_response(make_hero(1, "190 cm")), to_api_response(make_hero(2, "200 cm"))])
+    assert index.tallest("Male", True)["id"] == "2"
+    index.delete("2")
+    assert index.tallest("Male", True)["id"] == "1"
+
+def test_compaction_bounds_heap():
+    """Тестирование перестроения кучи при накоплении устаревших записей."""
+    index = TallestHeroIndex()
+    for height in range(100, 100 + 10 * COMPACT_SLACK):
+        index.upsert(make_hero(1, f"{height} cm"))
+    assert len(index._heaps[("Male", True)]) <= COMPACT_SLACK + 2
+    assert index.tallest("Male", True)["appearance"]["height"][1] == f"{99 + 10 * COMPACT_SLACK} cm"
+
+def test_replay(tmp_path):
+    """Тестирование применения ленты изменений из файла."""
+    path = str(tmp_path / "changes.jsonl")
+    write_change_log(path, 40, 200, seed=1)
+    index = TallestHeroIndex()
+    assert index.replay(path) == 240
+    expected = TallestHeroIndex()
+    for event in generate_changes(40, 200, seed=1):
+        expected.apply(event)
+    assert index.tallest("Female", False) == expected.tallest("Female", False)
+    assert index.top("Male", True, 3) == expected.top("Male", True, 3)
+
+def test_unknown_operation():
+    """Тестирование ошибки для неизвестного типа события."""
+    with pytest.raises(ValueError, match="Неизвестный тип события"):
+        TallestHeroIndex().apply({"op": "upsert", "hero": make_hero(1, "190 cm")})